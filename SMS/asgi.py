@@ -3,6 +3,7 @@ from django.core.asgi import get_asgi_application
 from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 import communications.routing
+import finance.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SMS.settings")
 
@@ -11,6 +12,7 @@ application = ProtocolTypeRouter({
     "websocket": AuthMiddlewareStack(
         URLRouter(
             communications.routing.websocket_urlpatterns
+            + finance.routing.websocket_urlpatterns
         )
     ),
 })
@@ -107,6 +107,36 @@ else:
         }
     }
 
+# -----------------------------------------
+# 🧠 Cache (shared across workers when Redis is configured)
+# -----------------------------------------
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+    }
+else:
+    # Version counters, 304s and import error reports must be seen by every
+    # worker, so fall back to the database rather than a per-process cache.
+    # The table is created with `manage.py createcachetable`. Django's default
+    # of 300 entries would cull live version counters and per-student
+    # snapshots on any real school, so allow room for several keys per student.
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "sms_cache",
+            "OPTIONS": {"MAX_ENTRIES": 50000},
+        }
+    }
+
+# Result sheet PDFs are only worth caching in Redis; in the database cache
+# every blob would be another row in sms_cache.
+RESULT_PDF_CACHE = bool(CACHE_REDIS_URL)
+
 # -----------------------------------------
 # 👥 Authentication
 # -----------------------------------------
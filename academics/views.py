@@ -2,7 +2,7 @@
 from datetime import date, datetime
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
-from accounts.models import Student, CustomUser
+from accounts.models import Student, CustomUser, StudentIdSequence
 from django.db import transaction
 import csv
 from django.http import HttpResponse
@@ -126,35 +126,71 @@ def import_students(request):
         skipped_count = 0
 
         try:
+            # 🔹 First pass: validate rows and parse dates
+            rows = []
+            for row in reader:
+                student_id = (row.get("student_id") or "").strip()
+                full_name = row.get("full_name")
+                email = row.get("email")
+                class_name = row.get("current_class")
+                admission_date_str = (row.get("admission_date") or "").strip()
+
+                # student_id is optional: missing ones are generated below
+                if not all([full_name, email, class_name]):
+                    skipped_count += 1
+                    continue
+
+                # 🔹 Parse admission date safely
+                admission_date = None
+                if admission_date_str:
+                    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y"):
+                        try:
+                            admission_date = datetime.strptime(admission_date_str, fmt).date()
+                            break
+                        except ValueError:
+                            continue
+                if not admission_date:
+                    admission_date = now().date()
+
+                rows.append((row, student_id, full_name, email, class_name, admission_date))
+
             with transaction.atomic():
-                for row in reader:
-                    student_id = row.get("student_id")
-                    full_name = row.get("full_name")
-                    email = row.get("email")
-                    class_name = row.get("current_class")
-                    section = row.get("section", "")
-                    guardian_name = row.get("guardian_name", "")
-                    guardian_contact = row.get("guardian_contact", "")
-                    admission_date_str = row.get("admission_date", "").strip()
-
-                    if not all([student_id, full_name, email, class_name]):
+                # 🔹 Drop rows whose user already has a Student (or repeats an
+                # earlier row) before any ID is reserved for them.
+                enrolled = set(
+                    Student.objects.filter(user__username__in={r[3] for r in rows})
+                    .values_list("user__username", flat=True)
+                )
+                new_rows = []
+                for r in rows:
+                    if r[3] in enrolled:
                         skipped_count += 1
                         continue
-
-                    # 🔹 Parse admission date safely
-                    admission_date = None
-                    if admission_date_str:
-                        for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y"):
-                            try:
-                                admission_date = datetime.strptime(admission_date_str, fmt).date()
-                                break
-                            except ValueError:
-                                continue
-                    if not admission_date:
-                        admission_date = now().date()
+                    enrolled.add(r[3])
+                    new_rows.append(r)
+                rows = new_rows
+
+                # 🔹 Reserve one contiguous block of IDs per admission year
+                # instead of a MAX(student_id) query per new student.
+                StudentIdSequence.advance_past(r[1] for r in rows if r[1])
+                missing_per_year = {}
+                for r in rows:
+                    if not r[1]:
+                        missing_per_year[r[5].year] = missing_per_year.get(r[5].year, 0) + 1
+                reserved_ids = {
+                    year: iter(StudentIdSequence.allocate(count, year))
+                    for year, count in missing_per_year.items()
+                }
+
+                classrooms = {}
+                for row, student_id, full_name, email, class_name, admission_date in rows:
+                    if not student_id:
+                        student_id = next(reserved_ids[admission_date.year])
 
                     # 🔹 Get or create classroom
-                    classroom, _ = ClassRoom.objects.get_or_create(name=class_name)
+                    if class_name not in classrooms:
+                        classrooms[class_name], _ = ClassRoom.objects.get_or_create(name=class_name)
+                    classroom = classrooms[class_name]
 
                     # 🔹 Split full name for CustomUser
                     parts = full_name.strip().split()
@@ -183,9 +219,9 @@ def import_students(request):
                         defaults={
                             "student_id": student_id,
                             "current_class": classroom,
-                            "section": section,
-                            "guardian_name": guardian_name,
-                            "guardian_contact": guardian_contact,
+                            "section": row.get("section", ""),
+                            "guardian_name": row.get("guardian_name", ""),
+                            "guardian_contact": row.get("guardian_contact", ""),
                             "admission_date": admission_date,
                         },
                     )
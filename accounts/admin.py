@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Admin, Teacher, Student, Accountant, Parent
+from .models import CustomUser, Admin, Teacher, Student, Accountant, Parent, StudentIdSequence
 
 # Customize the admin site headers and titles
 admin.site.site_header = "School Management System"
@@ -104,4 +104,7 @@ class ParentAdmin(BaseProfileAdmin):
     list_filter = ("relationship",)
 
 
-
+@admin.register(StudentIdSequence)
+class StudentIdSequenceAdmin(admin.ModelAdmin):
+    list_display = ("year", "last_number")
+    ordering = ("-year",)
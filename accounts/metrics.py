@@ -0,0 +1,188 @@
+from django.core.cache import cache
+from django.db.models import Avg, Count, DecimalField, IntegerField, OuterRef, Q, Subquery, Sum
+
+from SMS.versioning import bump_version, get_versions
+from finance.models import StudentFeeRecord
+from results.models import ResultRecord
+from results.stats import class_stats_many
+from academics.models import Subject
+from .models import CustomUser, Student
+
+# ======================================================
+# 🔹 Per-student dashboard snapshot
+# ======================================================
+# Computed in one query and cached under the student's version scope, which
+# ResultRecord / StudentFeeRecord / Invoice writes for that student bump.
+SNAPSHOT_CACHE_TIMEOUT = 60 * 60
+
+TERMS = [term for term, _ in ResultRecord.TERM_CHOICES]
+
+
+def student_version_scope(student_id):
+    return f"student:{student_id}"
+
+
+def bump_student_versions(student_ids):
+    scopes = [student_version_scope(student_id) for student_id in set(student_ids) if student_id]
+    if scopes:
+        bump_version(*scopes)
+
+
+def _cached_snapshot(scope, build):
+    version = get_versions([scope])[scope]
+    cache_key = f"dashboard:{scope}:{version!r}"
+    snapshot = cache.get(cache_key)
+    if snapshot is None:
+        snapshot = build()
+        cache.set(cache_key, snapshot, SNAPSHOT_CACHE_TIMEOUT)
+    return snapshot
+
+
+def _term_series(row):
+    """(terms, averages) for the terms that have results, in term order."""
+    terms, averages = [], []
+    for term in TERMS:
+        average = row[f"avg_{term}"]
+        if average is not None:
+            terms.append(term)
+            averages.append(float(average))
+    return terms, averages
+
+
+def _build_student_snapshot(student_id):
+    ranked = ResultRecord.objects.filter(student=OuterRef("pk")).values("subject__name")
+    fees = StudentFeeRecord.objects.filter(student=OuterRef("pk")).order_by().values("student")
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    row = (
+        Student.objects.filter(pk=student_id)
+        .annotate(
+            avg_score=Avg("results__total_score"),
+            **{f"avg_{term}": Avg("results__total_score", filter=Q(results__term=term)) for term in TERMS},
+            best_subject=Subquery(ranked.order_by("-total_score")[:1]),
+            worst_subject=Subquery(ranked.order_by("total_score")[:1]),
+            total_due=Subquery(fees.annotate(total=Sum("total_amount")).values("total"), output_field=money),
+            total_paid=Subquery(fees.annotate(total=Sum("amount_paid")).values("total"), output_field=money),
+            cleared_fees=Subquery(
+                fees.annotate(total=Count("id", filter=Q(is_cleared=True))).values("total"),
+                output_field=IntegerField(),
+            ),
+            uncleared_fees=Subquery(
+                fees.annotate(total=Count("id", filter=Q(is_cleared=False))).values("total"),
+                output_field=IntegerField(),
+            ),
+        )
+        .values(
+            "avg_score", "best_subject", "worst_subject", "total_due", "total_paid",
+            "cleared_fees", "uncleared_fees", *[f"avg_{term}" for term in TERMS],
+        )
+        .first()
+    )
+
+    terms, avg_scores = _term_series(row)
+    total_due = row["total_due"] or 0
+    total_paid = row["total_paid"] or 0
+    return {
+        "avg_score": round(row["avg_score"] or 0, 2),
+        # Dicts keep the template's {{ best_subject.subject }} working.
+        "best_subject": {"subject": row["best_subject"]} if row["best_subject"] else None,
+        "worst_subject": {"subject": row["worst_subject"]} if row["worst_subject"] else None,
+        "terms": terms,
+        "avg_scores": avg_scores,
+        "total_due": total_due,
+        "total_paid": total_paid,
+        "total_balance": total_due - total_paid,
+        "cleared_fees": row["cleared_fees"] or 0,
+        "uncleared_fees": row["uncleared_fees"] or 0,
+    }
+
+
+def student_dashboard_snapshot(student):
+    return _cached_snapshot(
+        student_version_scope(student.pk), lambda: _build_student_snapshot(student.pk)
+    )
+
+
+# ======================================================
+# 🔹 Per-teacher dashboard snapshot
+# ======================================================
+# Bumped by ResultRecord writes (old and new teacher) and Subject reassignments.
+def teacher_version_scope(teacher_id):
+    return f"teacher:{teacher_id}"
+
+
+def bump_teacher_versions(teacher_ids):
+    scopes = [teacher_version_scope(teacher_id) for teacher_id in set(teacher_ids) if teacher_id]
+    if scopes:
+        bump_version(*scopes)
+
+
+def _build_teacher_snapshot(teacher_id):
+    subjects = Subject.objects.filter(teacher=OuterRef("pk")).order_by().values("teacher")
+
+    row = (
+        CustomUser.objects.filter(pk=teacher_id)
+        .annotate(
+            total_results=Count("marked_results"),
+            total_classes=Count("marked_results__classroom", distinct=True),
+            avg_score=Avg("marked_results__total_score"),
+            unmarked_scripts=Count("marked_results", filter=Q(marked_results__total_score=0)),
+            **{
+                f"avg_{term}": Avg("marked_results__total_score", filter=Q(marked_results__term=term))
+                for term in TERMS
+            },
+            total_subjects=Subquery(
+                subjects.annotate(total=Count("id")).values("total"), output_field=IntegerField()
+            ),
+        )
+        .values(
+            "total_results", "total_classes", "avg_score", "unmarked_scripts", "total_subjects",
+            *[f"avg_{term}" for term in TERMS],
+        )
+        .first()
+    )
+
+    terms, avg_scores = _term_series(row)
+    return {
+        "total_results": row["total_results"],
+        "total_subjects": row["total_subjects"] or 0,
+        "total_classes": row["total_classes"],
+        "avg_score": round(row["avg_score"] or 0, 2),
+        "terms": terms,
+        "avg_scores": avg_scores,
+        "unmarked_scripts": row["unmarked_scripts"],
+    }
+
+
+def teacher_dashboard_snapshot(teacher):
+    return _cached_snapshot(
+        teacher_version_scope(teacher.pk), lambda: _build_teacher_snapshot(teacher.pk)
+    )
+
+
+def teacher_subject_stats(teacher, session):
+    """
+    Class statistics for each of the teacher's subjects and terms in a
+    session, as rows for the dashboard table (cached per class-term).
+    """
+    if session is None:
+        return []
+    subjects = list(
+        Subject.objects.filter(teacher=teacher).order_by("classroom__name", "name")
+        .values("id", "name", "classroom_id", "classroom__name")
+    )
+    stats = class_stats_many(
+        (subject["classroom_id"], session.pk, term) for subject in subjects for term in TERMS
+    )
+    rows = []
+    for subject in subjects:
+        for term in TERMS:
+            subject_stats = stats.get((subject["classroom_id"], session.pk, term), {}).get(subject["id"])
+            if subject_stats and subject_stats["count"]:
+                rows.append({
+                    "subject": subject["name"],
+                    "classroom": subject["classroom__name"],
+                    "term": term,
+                    **subject_stats,
+                })
+    return rows
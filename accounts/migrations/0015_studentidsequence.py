@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-17 05:59
+
+from django.db import migrations, models
+
+
+def seed_student_id_sequences(apps, schema_editor):
+    """Start each admission year's counter after the highest existing ID."""
+    Student = apps.get_model('accounts', 'Student')
+    StudentIdSequence = apps.get_model('accounts', 'StudentIdSequence')
+
+    last_numbers = {}
+    for student_id in Student.objects.values_list('student_id', flat=True).iterator():
+        if student_id and len(student_id) >= 8 and student_id.isdigit():
+            year, number = int(student_id[:4]), int(student_id[4:])
+            last_numbers[year] = max(last_numbers.get(year, 0), number)
+
+    StudentIdSequence.objects.bulk_create(
+        StudentIdSequence(year=year, last_number=last) for year, last in last_numbers.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_alter_customuser_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_student_id_sequences, migrations.RunPython.noop),
+    ]
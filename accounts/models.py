@@ -130,9 +130,67 @@ class Parent(BaseProfile):
 
 # ============================================================
 # 3️⃣ Student Profile with Auto-generated Student ID
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
-from django.db.models import Max
+
+
+class StudentIdSequence(models.Model):
+    """
+    Per-admission-year counter behind student IDs (e.g. 20250001).
+
+    The year's row is locked while numbers are reserved, so concurrent
+    registrations never collide, and a batch import can reserve a whole
+    contiguous block in one round trip.
+    """
+    year = models.PositiveIntegerField(unique=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+    @staticmethod
+    def format_id(year, number):
+        return f"{year}{number:04d}"
+
+    @classmethod
+    def parse_id(cls, student_id):
+        """(year, number) for an ID that format_id() could have produced, else None."""
+        if len(student_id) < 8 or not student_id.isascii() or not student_id.isdigit():
+            return None
+        year, number = int(student_id[:4]), int(student_id[4:])
+        # Round-trip so padded or unrelated numbers (phone numbers, legacy
+        # registers) don't move a counter, and only plausible admission years count.
+        if cls.format_id(year, number) != student_id or not 1900 <= year <= now().year + 1:
+            return None
+        return year, number
+
+    @classmethod
+    def allocate(cls, count=1, year=None):
+        """Reserve `count` consecutive student IDs for `year` and return them."""
+        year = year or now().year
+        with transaction.atomic():
+            cls.objects.get_or_create(year=year)
+            sequence = cls.objects.select_for_update().get(year=year)
+            first = sequence.last_number + 1
+            sequence.last_number += count
+            sequence.save(update_fields=["last_number"])
+        return [cls.format_id(year, number) for number in range(first, first + count)]
+
+    @classmethod
+    def advance_past(cls, student_ids):
+        """Move counters beyond externally supplied IDs in the generated format (e.g. from a CSV)."""
+        highest = {}
+        for student_id in student_ids:
+            parsed = cls.parse_id(student_id)
+            if parsed:
+                year, number = parsed
+                highest[year] = max(highest.get(year, 0), number)
+
+        with transaction.atomic():
+            for year, number in highest.items():
+                cls.objects.get_or_create(year=year)
+                cls.objects.filter(year=year, last_number__lt=number).update(last_number=number)
+
 
 class Student(BaseProfile):
     user = models.OneToOneField('accounts.CustomUser', on_delete=models.CASCADE)
@@ -158,25 +216,10 @@ class Student(BaseProfile):
         return True
 
     def save(self, *args, **kwargs):
-        # 🔹 Auto-generate student_id only if not already set
+        # 🔹 Auto-generate student_id only if not already set (e.g. 20250001)
         if not self.student_id:
             admission_year = self.admission_date.year if self.admission_date else now().year
-            prefix = str(admission_year)
-            
-            # 🔹 Get the latest student_id for this year
-            last_student = Student.objects.filter(student_id__startswith=prefix).aggregate(
-                Max('student_id')
-            )['student_id__max']
-            
-            if last_student:
-                # Increment the numeric part
-                last_number = int(last_student[-4:])  # last 4 digits
-                new_number = last_number + 1
-            else:
-                new_number = 1  # start from 0001 for new year
-
-            # 🔹 Build 8-digit ID (e.g., 20250001)
-            self.student_id = f"{prefix}{new_number:04d}"
+            self.student_id = StudentIdSequence.allocate(1, admission_year)[0]
         
         super().save(*args, **kwargs)
 
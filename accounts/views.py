@@ -2,17 +2,18 @@
 # ✅ CLEAN & OPTIMIZED ACCOUNTS VIEWS
 # ==========================================
 
-from datetime import timedelta
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Sum, Q, Avg
+from django.db.models import Avg, Count, DecimalField, OuterRef, Q, Subquery, Sum
 from django.utils import timezone
 
 from .models import CustomUser, Student, Teacher, Parent
-from finance.models import Invoice, Payment, FinanceSummary, StudentFeeRecord
+from finance.models import Invoice, Payment, StudentFeeRecord
+from finance.metrics import dashboard_metrics
+from .metrics import student_dashboard_snapshot, teacher_dashboard_snapshot, teacher_subject_stats
 from academics.models import Session, Subject
 from results.models import ResultRecord, ResultSummary
 from django.urls import resolve
@@ -188,70 +189,21 @@ def profile(request):
 # ==========================================
 @login_required
 def admin_dashboard(request):
-    total_students = Student.objects.count()
-    total_teachers = Teacher.objects.count()
-    total_invoices = Invoice.objects.count()
-
-    invoice_stats = Invoice.objects.aggregate(
-        total_paid=Sum("total_paid"),
-        total_due=Sum("total_due"),
-    )
-
-    total_paid = invoice_stats["total_paid"] or Decimal("0")
-    total_due = invoice_stats["total_due"] or Decimal("0")
-    total_balance = total_due - total_paid
-
-
-    fully_paid = Invoice.objects.filter(is_paid=True).count()
-    partially_paid = Invoice.objects.filter(balance__gt=0, total_paid__gt=0).count()
-    unpaid = Invoice.objects.filter(total_paid=0).count()
-    total_due = float(invoice_stats['total_due'] or 0)
-
-    pending_total = Invoice.objects.filter(
-        balance__gt=0, total_paid__gt=0
-    ).aggregate(total=Sum("balance"))["total"] or 0
-
-    # Chart Data (Last 12 Months)
-    today = timezone.now().date()
-    months, revenues = [], []
-    
-    for i in range(11, -1, -1):
-        month_start = today.replace(day=1) - timedelta(days=30 * i)
-        month_end = (month_start + timedelta(days=31)).replace(day=1)
-        label = month_start.strftime("%b %Y")
-
-        total = Payment.objects.filter(
-            date_paid__gte=month_start, date_paid__lt=month_end
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        months.append(label)
-        revenues.append(float(total))
-
-    # Sync Finance Summary
-    FinanceSummary.objects.update_or_create(
-        id=1,
-        defaults={
-            'total_students': total_students,
-            'total_invoices': total_invoices,
-            'total_fees_paid': total_paid,
-            'total_fees_pending': pending_total,
-            'total_fees_unpaid': total_balance,
-        }
-    )
+    metrics = dashboard_metrics(months=12)
 
     return render(request, "accounts/admin_dashboard.html", {
-        "total_students": total_students,
-        "total_teachers": total_teachers,
-        "total_invoices": total_invoices,
-        "total_fees_due": total_due,
-        "total_fees_paid": total_paid,
-        "pending_fees": pending_total,
-        "unpaid_fees": total_balance,
-        "fully_paid": fully_paid,
-        "partially_paid": partially_paid,
-        "unpaid": unpaid,
-        "monthly_labels": months,
-        "monthly_revenue": revenues,
+        "total_students": metrics["total_students"],
+        "total_teachers": metrics["total_teachers"],
+        "total_invoices": metrics["total_invoices"],
+        "total_fees_due": float(metrics["total_due"]),
+        "total_fees_paid": metrics["total_paid"],
+        "pending_fees": metrics["pending_total"],
+        "unpaid_fees": metrics["total_balance"],
+        "fully_paid": metrics["fully_paid"],
+        "partially_paid": metrics["partially_paid"],
+        "unpaid": metrics["unpaid"],
+        "monthly_labels": metrics["monthly_labels"],
+        "monthly_revenue": metrics["monthly_revenue"],
     })
 
 
@@ -511,20 +463,8 @@ def teacher_dashboard(request):
     try:
         teacher = request.user
 
-        total_results = ResultRecord.objects.filter(teacher=teacher).count()
-        total_subjects = Subject.objects.filter(teacher=teacher).count()
-        total_classes = (
-            ResultRecord.objects.filter(teacher=teacher)
-            .values("classroom")
-            .distinct()
-            .count()
-        )
-
-        avg_score = (
-            ResultRecord.objects.filter(teacher=teacher)
-            .aggregate(avg=Avg("total_score"))
-            .get("avg") or 0
-        )
+        # Counts, averages and term stats: one cached aggregate snapshot
+        snapshot = teacher_dashboard_snapshot(teacher)
 
         recent_results = (
             ResultRecord.objects.filter(teacher=teacher)
@@ -532,32 +472,16 @@ def teacher_dashboard(request):
             .order_by("-date_recorded")[:6]
         )
 
-        term_stats = (
-            ResultRecord.objects.filter(teacher=teacher)
-            .values("term")
-            .annotate(avg_score=Avg("total_score"))
-            .order_by("term")
-        )
-
-        terms = [item["term"] for item in term_stats]
-        avg_scores = [float(item["avg_score"]) for item in term_stats if item["avg_score"]]
-
-        unmarked_scripts = ResultRecord.objects.filter(
-            teacher=teacher, total_score=0
-        ).count()
+        # Class mean/median/spread per subject and term (cached per class-term)
+        subject_stats = teacher_subject_stats(teacher, Session.objects.filter(is_current=True).first())
 
         return render(
             request,
             "accounts/teacher_dashboard.html",
             {
-                "total_results": total_results,
-                "total_subjects": total_subjects,
-                "total_classes": total_classes,
-                "avg_score": round(avg_score, 2),
+                **snapshot,
                 "recent_results": recent_results,
-                "terms": terms,
-                "avg_scores": avg_scores,
-                "unmarked_scripts": unmarked_scripts,
+                "subject_stats": subject_stats,
             },
         )
 
@@ -576,112 +500,40 @@ def student_dashboard(request):
         "subject", "session"
     ).order_by("-date_recorded")[:6]
 
-    avg_score = ResultRecord.objects.filter(student=student).aggregate(avg=Avg("total_score"))["avg"] or 0
-    best_subject = ResultRecord.objects.filter(student=student).order_by("-total_score").first()
-    worst_subject = ResultRecord.objects.filter(student=student).order_by("total_score").first()
-
-    term_stats = (
-        ResultRecord.objects.filter(student=student)
-        .values("term")
-        .annotate(avg_score=Avg("total_score"))
-        .order_by("term")
-    )
-
-    terms = [item["term"] for item in term_stats]
-    avg_scores = [float(item["avg_score"]) for item in term_stats]
+    # Averages, best/worst subject, term stats and fee totals: one cached snapshot
+    snapshot = student_dashboard_snapshot(student)
 
     # Finance
     fee_records = StudentFeeRecord.objects.filter(student=student)
-    total_due = fee_records.aggregate(total=Sum("total_amount"))["total"] or 0
-    total_paid = fee_records.aggregate(total=Sum("amount_paid"))["total"] or 0
-    total_balance = total_due - total_paid
-    cleared_fees = fee_records.filter(is_cleared=True).count()
-    uncleared_fees = fee_records.filter(is_cleared=False).count()
     invoices = Invoice.objects.filter(student=student).order_by("-date_issued")[:5]
 
     return render(request, "accounts/student_dashboard.html", {
         "summaries": summaries,
         "recent_results": recent_results,
-        "avg_score": round(avg_score, 2),
-        "best_subject": best_subject,
-        "worst_subject": worst_subject,
-        "terms": terms,
-        "avg_scores": avg_scores,
+        **snapshot,
         "fee_records": fee_records,
-        "total_due": total_due,
-        "total_paid": total_paid,
-        "total_balance": total_balance,
-        "cleared_fees": cleared_fees,
-        "uncleared_fees": uncleared_fees,
         "invoices": invoices,
     })
 
 
 @login_required
 def accountant_dashboard(request):
-    total_students = Student.objects.count()
-    total_invoices = Invoice.objects.count()
-
-    invoice_stats = Invoice.objects.aggregate(
-        total_paid=Sum('total_paid'),
-        total_due=Sum('total_due'),
-    )
-
-    total_paid = float(invoice_stats['total_paid'] or 0)
-    total_due = float(invoice_stats['total_due'] or 0)
-    total_balance = total_due - total_paid
-
-
-    fully_paid = Invoice.objects.filter(is_paid=True).count()
-    partially_paid = Invoice.objects.filter(balance__gt=0, total_paid__gt=0).count()
-    unpaid = Invoice.objects.filter(total_paid=0).count()
-    
-    pending_total = Invoice.objects.filter(balance__gt=0, total_paid__gt=0).aggregate(
-        total=Sum("balance")
-    )["total"] or 0
-
-    # Last 6 months data
-    today = timezone.now().date()
-    months, revenues = [], []
-    
-    for i in range(5, -1, -1):
-        month_start = today.replace(day=1) - timedelta(days=30 * i)
-        month_end = (month_start + timedelta(days=31)).replace(day=1)
-        label = month_start.strftime("%b %Y")
-        
-        total = Payment.objects.filter(
-            date_paid__gte=month_start, date_paid__lt=month_end
-        ).aggregate(total=Sum("amount"))["total"] or 0
-        
-        months.append(label)
-        revenues.append(float(total))
-
-    # Update finance summary
-    FinanceSummary.objects.update_or_create(
-        id=1,
-        defaults={
-            'total_students': total_students,
-            'total_invoices': total_invoices,
-            'total_fees_paid': total_paid,
-            'total_fees_pending': pending_total,
-            'total_fees_unpaid': total_balance,
-        }
-    )
+    metrics = dashboard_metrics(months=6)
 
     invoices = Invoice.objects.select_related("student").order_by("-date_issued")[:5]
 
     return render(request, "accounts/accountant_dashboard.html", {
-        "total_students": total_students,
-        "total_invoices": total_invoices,
-        "total_paid": total_paid,
-        "total_due": total_due,
-        "total_balance": total_balance,
-        "fully_paid": fully_paid,
-        "partially_paid": partially_paid,
-        "unpaid": unpaid,
-        "pending_total": pending_total,
-        "monthly_labels": months,
-        "monthly_revenue": revenues,
+        "total_students": metrics["total_students"],
+        "total_invoices": metrics["total_invoices"],
+        "total_paid": float(metrics["total_paid"]),
+        "total_due": float(metrics["total_due"]),
+        "total_balance": float(metrics["total_balance"]),
+        "fully_paid": metrics["fully_paid"],
+        "partially_paid": metrics["partially_paid"],
+        "unpaid": metrics["unpaid"],
+        "pending_total": metrics["pending_total"],
+        "monthly_labels": metrics["monthly_labels"],
+        "monthly_revenue": metrics["monthly_revenue"],
         "invoices": invoices,
     })
 
@@ -701,48 +553,54 @@ def parent_dashboard(request):
         messages.error(request, "Parent profile not found. Please contact the administrator.")
         return redirect("custom_login")
 
-    # ✅ Preload all children + related data efficiently
-    children = parent.children.select_related("user").prefetch_related(
-        "results__session", "results__subject", "studentfeerecord_set__payments"
+    # ✅ All children with their figures in one query: result stats via a join,
+    #    fee totals / latest result / last payment via correlated subqueries
+    #    (separate subqueries keep the fee sums from multiplying by result rows).
+    scored = ~Q(results__test_score=0, results__exam_score=0)
+    child_results = (
+        ResultRecord.objects.filter(student=OuterRef("pk"))
+        .exclude(test_score=0, exam_score=0)
+        .order_by("-date_recorded")
+    )
+    child_fees = StudentFeeRecord.objects.filter(student=OuterRef("pk")).order_by().values("student")
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    children = parent.children.select_related("user").annotate(
+        result_count=Count("results", filter=scored),
+        result_total=Sum("results__total_score", filter=scored),
+        latest_grade=Subquery(child_results.values("grade")[:1]),
+        latest_score=Subquery(child_results.values("total_score")[:1]),
+        fee_total=Subquery(child_fees.annotate(total=Sum("total_amount")).values("total"), output_field=money),
+        fee_paid=Subquery(child_fees.annotate(total=Sum("amount_paid")).values("total"), output_field=money),
+        last_payment_id=Subquery(
+            Payment.objects.filter(student_fee__student=OuterRef("pk")).order_by("-date_paid").values("id")[:1]
+        ),
+    )
+    children = list(children)
+    last_payments = Payment.objects.in_bulk(
+        [child.last_payment_id for child in children if child.last_payment_id]
     )
 
     dashboard_data = []
 
     for child in children:
-        # Gather result-related data
-        results = child.results.filter(~Q(test_score=0, exam_score=0))
-        latest_result = results.order_by("-date_recorded").first()
-
-        grade = latest_result.grade if latest_result else "N/A"
-        score = latest_result.total_score if latest_result else "N/A"
-
-        avg_total = results.aggregate(total=Sum("total_score"))["total"] or 0
-        count = results.count()
-        average_score = round(avg_total / count, 2) if count else 0
-
-        # Gather fee-related data
-        fee_records = StudentFeeRecord.objects.filter(student=child)
-        total_fee = fee_records.aggregate(total=Sum("total_amount"))["total"] or 0
-        total_paid = fee_records.aggregate(total=Sum("amount_paid"))["total"] or 0
-        pending_balance = total_fee - total_paid
-
-        last_payment = (
-            Payment.objects.filter(student_fee__student=child)
-            .order_by("-date_paid")
-            .first()
-        )
+        count = child.result_count
+        average_score = round((child.result_total or 0) / count, 2) if count else 0
+
+        total_fee = child.fee_total or 0
+        total_paid = child.fee_paid or 0
 
         # Combine all data for each child
         dashboard_data.append({
             "child": child,
-            "grade": grade,
-            "score": score,
+            "grade": child.latest_grade if child.latest_grade is not None else "N/A",
+            "score": child.latest_score if child.latest_score is not None else "N/A",
             "average_score": average_score,
             "total_subjects": count,
             "total_fee": total_fee,
             "total_paid": total_paid,
-            "pending_balance": pending_balance,
-            "last_payment": last_payment,
+            "pending_balance": total_fee - total_paid,
+            "last_payment": last_payments.get(child.last_payment_id),
         })
 
     # ✅ Render the dashboard
@@ -42,3 +42,37 @@ def notify_participants(sender, instance, created, **kwargs):
     notified = [u for u in recipients if getattr(get_profile(u), "email_notify", False)]
     # Send notifications to `notified`
 
+
+
+# ======================================================
+# 🔹 Version bump for conditional GETs (fetch_new_messages)
+# ======================================================
+from django.db.models.signals import post_delete
+from SMS.versioning import bump_version
+from .models import Conversation, Attachment, MessageFlag
+
+
+def conversation_version_scope(conversation_id):
+    return f"conversation:{conversation_id}"
+
+
+@receiver(post_save, sender=Conversation)
+@receiver(post_delete, sender=Conversation)
+def bump_conversation_version(sender, instance, **kwargs):
+    bump_version(conversation_version_scope(instance.pk))
+
+
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+def bump_message_version(sender, instance, **kwargs):
+    bump_version(conversation_version_scope(instance.conversation_id))
+
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+@receiver(post_save, sender=MessageFlag)
+@receiver(post_delete, sender=MessageFlag)
+def bump_message_child_version(sender, instance, **kwargs):
+    conversation_id = Message.objects.filter(pk=instance.message_id).values_list("conversation_id", flat=True).first()
+    if conversation_id is not None:
+        bump_version(conversation_version_scope(conversation_id))
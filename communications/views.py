@@ -221,8 +221,10 @@ def send_message(request, convo_id):
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from .models import Message, Conversation  # adjust if your app name differs
+from SMS.versioning import conditional_on_versions
 
 @login_required
+@conditional_on_versions("conversation:{conversation_id}")
 def fetch_new_messages(request, conversation_id):
     last_id = request.GET.get("after", 0)
     conversation = Conversation.objects.get(pk=conversation_id)
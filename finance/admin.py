@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import FeeType, StudentFeeRecord, Payment, Invoice, FinanceSummary, Session, BulkFeeAssignment
+from .models import FeeType, StudentFeeRecord, Payment, PaymentMonthlyRollup, Invoice, InvoiceSequence, FinanceSummary, Session, BulkFeeAssignment
 
 
 # ===========================
@@ -51,6 +51,20 @@ class InvoiceAdmin(admin.ModelAdmin):
     date_hierarchy = "date_issued"
 
 
+@admin.register(InvoiceSequence)
+class InvoiceSequenceAdmin(admin.ModelAdmin):
+    list_display = ("year", "last_number")
+    ordering = ("-year",)
+
+
+@admin.register(PaymentMonthlyRollup)
+class PaymentMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ("month", "payment_method", "session", "term", "total", "count")
+    list_filter = ("payment_method", "session", "term")
+    readonly_fields = ("month", "payment_method", "session", "term", "total", "count")
+    date_hierarchy = "month"
+
+
 # ===========================
 # 🔹 Finance Summary Admin
 # ===========================
@@ -58,11 +72,13 @@ class InvoiceAdmin(admin.ModelAdmin):
 class FinanceSummaryAdmin(admin.ModelAdmin):
     list_display = (
         "total_students", "total_teachers", "total_invoices",
-        "total_fees_paid", "total_fees_pending", "total_fees_unpaid", "last_updated"
+        "total_fees_paid", "fees_pending", "total_fees_unpaid", "last_updated"
     )
     readonly_fields = (
         "total_students", "total_teachers", "total_invoices",
-        "total_fees_paid", "total_fees_pending", "total_fees_unpaid", "last_updated"
+        "total_fees_paid", "total_fees_pending", "total_fees_unpaid",
+        "invoice_total_due", "invoice_total_paid", "invoice_total_balance",
+        "invoice_total_pending", "students_with_fees", "last_updated"
     )
 
     def has_add_permission(self, request):
@@ -0,0 +1,26 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .live import FINANCE_GROUP
+
+FINANCE_ROLES = ("admin", "principal", "accountant")
+
+
+class FinanceConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes finance.update messages (summary + invoice deltas) to finance staff."""
+
+    async def connect(self):
+        user = self.scope["user"]
+        if not user.is_authenticated or user.role not in FINANCE_ROLES:
+            await self.close()
+            return
+
+        await self.channel_layer.group_add(FINANCE_GROUP, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(FINANCE_GROUP, self.channel_name)
+
+    async def finance_update(self, event):
+        payload = event.get("payload", {})
+        if payload:
+            await self.send_json(payload)
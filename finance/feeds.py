@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DeletedInvoice, FinanceSummary, Invoice
+from .utils import SUMMARY_ID, update_finance_summary
+
+# ======================================================
+# 🔹 Dashboard finance summary (finance_summary_json / live push)
+# ======================================================
+def finance_summary_data():
+    """
+    Dashboard totals from the FinanceSummary row the signals keep current:
+    one PK lookup, no table scan, so polls and live pushes agree.
+    """
+    summary = FinanceSummary.objects.filter(id=SUMMARY_ID).first() or update_finance_summary()
+    return {
+        "total_students": summary.total_students,
+        "students_with_fees": summary.students_with_fees,
+        "total_invoices": summary.total_invoices,
+        "total_paid": float(summary.invoice_total_paid),
+        "total_due": float(summary.invoice_total_due),
+        "total_balance": float(summary.invoice_total_balance),
+        "pending_total": float(summary.invoice_total_pending),
+    }
+
+
+# ======================================================
+# 🔹 Invoice change feed (invoices_json)
+# ======================================================
+# Clients page through invoices ordered by (last_modified, id) and then keep
+# polling with ?since=<cursor> to receive only what changed, plus the ids of
+# invoices deleted in the meantime.
+#
+# Rows are stamped before their transaction commits, so a row can become
+# visible after a later-stamped one was already served. Every page therefore
+# also returns tombstones from INVOICE_FEED_GRACE before its position, and once
+# a client has caught up its cursor is wound back by INVOICE_FEED_GRACE so the
+# next poll re-reads recent changes too (clients key rows by id). The rewound
+# cursor stays the same until something newer is served, so idle polls hit the
+# same URL and get their 304.
+INVOICE_FEED_PAGE_SIZE = 200
+INVOICE_FEED_MAX_PAGE_SIZE = 1000
+
+# DeletedInvoice tombstones are pruned after this. Cursors carry the time
+# they were issued; one older than this may have missed pruned tombstones
+# and gets a reset. Cursors are re-issued once half of this has passed.
+DELETED_INVOICE_RETENTION = timedelta(days=7)
+
+# Longest a write may take between stamping a row and committing it.
+INVOICE_FEED_GRACE = timedelta(minutes=5)
+
+
+def _parse_timestamp(value):
+    timestamp = datetime.fromisoformat(value)
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp, timezone.utc)
+    return timestamp
+
+
+def encode_invoice_cursor(last_modified, pk, issued_at):
+    return f"{last_modified.isoformat()}|{pk}|{issued_at.isoformat()}"
+
+
+def decode_invoice_cursor(cursor):
+    """
+    Return (last_modified, id, issued_at) or None for a missing/malformed
+    cursor. id 0 marks a cursor wound back to re-read recent changes.
+    """
+    try:
+        timestamp, pk, issued = cursor.split("|")
+        return _parse_timestamp(timestamp), int(pk), _parse_timestamp(issued)
+    except (AttributeError, ValueError):
+        return None
+
+
+def invoice_feed_page_size(value):
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return INVOICE_FEED_PAGE_SIZE
+    return max(1, min(page_size, INVOICE_FEED_MAX_PAGE_SIZE))
+
+
+def serialize_invoice(invoice):
+    """JSON-safe invoice row; Decimals become floats for JsonResponse."""
+    return {
+        "id": invoice.id,
+        "invoice_number": invoice.invoice_number,
+        "student_name": str(invoice.student),
+        "session": str(invoice.session) if invoice.session else "",
+        "term": invoice.term,
+        "total_due": float(invoice.total_due),
+        "total_paid": float(invoice.total_paid),
+        "balance": float(invoice.balance),
+        "is_paid": bool(invoice.is_paid),
+        "date_issued": invoice.date_issued.isoformat() if invoice.date_issued else None,
+    }
+
+
+def invoice_summary():
+    """Precomputed totals kept by the finance signals; no table scan."""
+    summary = FinanceSummary.objects.filter(id=SUMMARY_ID).first()
+    if summary is None:
+        return {"total_due": 0.0, "total_paid": 0.0, "total_balance": 0.0}
+    return {
+        "total_due": float(summary.invoice_total_due),
+        "total_paid": float(summary.invoice_total_paid),
+        "total_balance": float(summary.invoice_total_balance),
+    }
+
+
+def invoice_changes(since=None, page_size=INVOICE_FEED_PAGE_SIZE):
+    """
+    One page of the invoice feed after the `since` cursor.
+
+    Returns a dict with the changed invoices, ids deleted since the cursor,
+    the cursor to send next time, `has_more` when another page is waiting and
+    `reset` when the cursor was issued too long ago (or is invalid) for the
+    tombstones to be trusted, in which case the client should drop its copy
+    and start over. Recent rows and tombstones may be sent more than once.
+    """
+    now = timezone.now()
+    position = decode_invoice_cursor(since) if since else None
+    reset = bool(since) and (position is None or position[2] < now - DELETED_INVOICE_RETENTION)
+    if reset:
+        position = None
+
+    invoices = Invoice.objects.select_related("student__user", "session").order_by("last_modified", "id")
+    deleted = []
+    if position is not None:
+        last_modified, pk, issued_at = position
+        invoices = invoices.filter(
+            Q(last_modified__gt=last_modified) | Q(last_modified=last_modified, id__gt=pk)
+        )
+        deleted = list(
+            DeletedInvoice.objects.filter(deleted_at__gte=last_modified - INVOICE_FEED_GRACE)
+            .values_list("invoice_id", flat=True)
+            .distinct()
+        )
+
+    page = list(invoices[:page_size + 1])
+    has_more = len(page) > page_size
+    page = page[:page_size]
+
+    if page:
+        last_modified, pk = page[-1].last_modified, page[-1].pk
+    elif position is not None:
+        last_modified, pk = position[:2]
+    else:
+        last_modified = pk = None
+
+    cursor = None
+    if last_modified is not None:
+        if not has_more and pk:
+            # Caught up: wind back so the next poll re-reads late commits.
+            last_modified, pk = last_modified - INVOICE_FEED_GRACE, 0
+        issued_at = position[2] if position is not None else now
+        if issued_at < now - DELETED_INVOICE_RETENTION / 2:
+            issued_at = now
+        cursor = encode_invoice_cursor(last_modified, pk, issued_at)
+
+    return {
+        "invoices": [serialize_invoice(invoice) for invoice in page],
+        "deleted": deleted,
+        "cursor": cursor,
+        "has_more": has_more,
+        "reset": reset,
+        "summary": invoice_summary(),
+    }
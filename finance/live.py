@@ -0,0 +1,83 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from SMS.versioning import CommitBatch
+from .feeds import finance_summary_data, serialize_invoice
+from .models import Invoice
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# 🔹 Live finance updates (FinanceConsumer / ws/finance/)
+# ======================================================
+# Invoice and payment signals queue what changed; once the transaction commits
+# one message goes to every connected dashboard with finance_summary_data()
+# and the changed invoice rows. The payload is read after commit (one summary
+# row, at most LIVE_INVOICE_LIMIT invoices) and handed to a single background
+# sender, so the request never waits on the channel layer and pushes still go
+# out in commit order.
+FINANCE_GROUP = "finance"
+
+# Bigger batches only send a resync hint; clients then pull invoices_json?since=...
+LIVE_INVOICE_LIMIT = 200
+
+_sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix="finance-live")
+
+
+@dataclass
+class PendingFinanceUpdate:
+    invoice_ids: set = field(default_factory=set)
+    deleted_ids: set = field(default_factory=set)
+    resync: bool = False
+
+
+def push_finance_update(changes):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    invoice_ids, deleted_ids, resync = changes.invoice_ids, changes.deleted_ids, changes.resync
+
+    invoices = []
+    if len(invoice_ids) + len(deleted_ids) > LIVE_INVOICE_LIMIT:
+        resync = True
+    elif invoice_ids or deleted_ids:
+        # Ids left over from a rolled-back transaction may still exist (or never
+        # did); the database has the final word on what was saved or deleted.
+        rows = Invoice.objects.select_related("student__user", "session").filter(pk__in=invoice_ids | deleted_ids)
+        invoices = [serialize_invoice(invoice) for invoice in rows]
+        deleted_ids = deleted_ids - {invoice["id"] for invoice in invoices}
+
+    summary = finance_summary_data()
+    payload = {
+        "type": "finance.update",
+        "summary": summary,
+        # Same row, in invoice_summary()'s shape for manage_invoices.
+        "invoice_summary": {name: summary[name] for name in ("total_due", "total_paid", "total_balance")},
+        "invoices": invoices,
+        "deleted": sorted(deleted_ids) if not resync else [],
+        "resync": resync,
+    }
+    _sender.submit(_send, channel_layer, payload)
+
+
+def _send(channel_layer, payload):
+    try:
+        async_to_sync(channel_layer.group_send)(FINANCE_GROUP, {"type": "finance_update", "payload": payload})
+    except Exception:
+        # A missing Redis must never break the write that triggered the push.
+        logger.warning("Could not push live finance update", exc_info=True)
+
+
+_finance_updates = CommitBatch(PendingFinanceUpdate, push_finance_update)
+
+
+def queue_finance_update(invoice_ids=(), deleted_ids=(), resync=False):
+    """Collect changes and push them once the current transaction commits."""
+    with _finance_updates.collect() as pending:
+        pending.invoice_ids.update(invoice_ids)
+        pending.deleted_ids.update(deleted_ids)
+        pending.resync = pending.resync or resync
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from finance.utils import rebuild_payment_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute PaymentMonthlyRollup from raw payments to correct drift in the incremental totals."
+
+    def handle(self, *args, **options):
+        buckets = rebuild_payment_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Payment rollups rebuilt: {buckets} monthly buckets."))
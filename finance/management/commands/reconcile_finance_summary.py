@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from finance.utils import update_finance_summary
+
+
+class Command(BaseCommand):
+    help = "Recompute FinanceSummary from scratch to correct drift in the incremental totals."
+
+    def handle(self, *args, **options):
+        summary = update_finance_summary()
+        self.stdout.write(self.style.SUCCESS(
+            f"Finance summary reconciled: {summary.total_invoices} invoices, "
+            f"₵{summary.total_fees_paid} paid, ₵{summary.fees_pending} pending."
+        ))
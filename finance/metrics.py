@@ -0,0 +1,88 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from accounts.models import Student, Teacher
+from SMS.versioning import get_versions
+from .models import Invoice, PaymentMonthlyRollup
+from .signals import FINANCE_VERSION_SCOPE
+
+# ======================================================
+# 🔹 Admin / accountant dashboard metrics
+# ======================================================
+# Read-only: a fixed handful of queries, cached under the current "finance"
+# version so any finance write (see finance/signals.py) invalidates it.
+DASHBOARD_CACHE_TIMEOUT = 300
+
+
+def invoice_status_metrics():
+    """Invoice totals and paid/partial/unpaid counts in one conditional aggregate."""
+    owing_with_payment = Q(balance__gt=0, total_paid__gt=0)
+    totals = Invoice.objects.aggregate(
+        total_invoices=Count("id"),
+        paid=Sum("total_paid"),
+        due=Sum("total_due"),
+        fully_paid=Count("id", filter=Q(is_paid=True)),
+        partially_paid=Count("id", filter=owing_with_payment),
+        unpaid=Count("id", filter=Q(total_paid=0)),
+        pending=Sum("balance", filter=owing_with_payment),
+    )
+    total_paid = totals["paid"] or Decimal("0")
+    total_due = totals["due"] or Decimal("0")
+
+    return {
+        "total_invoices": totals["total_invoices"],
+        "total_paid": total_paid,
+        "total_due": total_due,
+        "total_balance": total_due - total_paid,
+        "fully_paid": totals["fully_paid"],
+        "partially_paid": totals["partially_paid"],
+        "unpaid": totals["unpaid"],
+        "pending_total": totals["pending"] or Decimal("0"),
+    }
+
+
+def _month_starts(months, today):
+    """First day of each of the last `months` calendar months, oldest first."""
+    starts = []
+    year, month = today.year, today.month
+    for _ in range(months):
+        starts.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return starts[::-1]
+
+
+def monthly_revenue(months):
+    """(labels, revenues) for the last `months` months, read from PaymentMonthlyRollup."""
+    starts = _month_starts(months, timezone.localdate())
+    totals = dict(
+        PaymentMonthlyRollup.objects.filter(month__gte=starts[0])
+        .values("month")
+        .annotate(total=Sum("total"))
+        .order_by()
+        .values_list("month", "total")
+    )
+    labels = [start.strftime("%b %Y") for start in starts]
+    revenues = [float(totals.get(start) or 0) for start in starts]
+    return labels, revenues
+
+
+def dashboard_metrics(months=12):
+    """Everything the admin/accountant dashboards show, cached per finance version."""
+    version = get_versions([FINANCE_VERSION_SCOPE])[FINANCE_VERSION_SCOPE]
+    cache_key = f"finance:dashboard:{months}:{version!r}"
+    metrics = cache.get(cache_key)
+    if metrics is None:
+        labels, revenues = monthly_revenue(months)
+        metrics = {
+            "total_students": Student.objects.count(),
+            "total_teachers": Teacher.objects.count(),
+            **invoice_status_metrics(),
+            "monthly_labels": labels,
+            "monthly_revenue": revenues,
+        }
+        cache.set(cache_key, metrics, DASHBOARD_CACHE_TIMEOUT)
+    return metrics
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-17 05:58
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_invoice_sequences(apps, schema_editor):
+    """Start each year's counter after the highest existing INV-<year>-NNNN."""
+    Invoice = apps.get_model('finance', 'Invoice')
+    InvoiceSequence = apps.get_model('finance', 'InvoiceSequence')
+    pattern = re.compile(r'^INV-(\d{4})-(\d+)$')
+
+    last_numbers = {}
+    for number in Invoice.objects.filter(invoice_number__startswith='INV-').values_list('invoice_number', flat=True).iterator():
+        match = pattern.match(number)
+        if match:
+            year, sequence = int(match.group(1)), int(match.group(2))
+            last_numbers[year] = max(last_numbers.get(year, 0), sequence)
+
+    InvoiceSequence.objects.bulk_create(
+        InvoiceSequence(year=year, last_number=last) for year, last in last_numbers.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_alter_payment_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_invoice_sequences, migrations.RunPython.noop),
+    ]
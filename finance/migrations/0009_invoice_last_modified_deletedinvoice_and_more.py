@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:10
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_invoice_totals(apps, schema_editor):
+    """Seed the new invoice totals so they don't read 0 until the next reconcile."""
+    Invoice = apps.get_model("finance", "Invoice")
+    FinanceSummary = apps.get_model("finance", "FinanceSummary")
+    totals = Invoice.objects.aggregate(due=Sum("total_due"), paid=Sum("total_paid"), balance=Sum("balance"))
+    FinanceSummary.objects.update(
+        invoice_total_due=totals["due"] or 0,
+        invoice_total_paid=totals["paid"] or 0,
+        invoice_total_balance=totals["balance"] or 0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_invoicesequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedInvoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invoice_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='financesummary',
+            name='invoice_total_balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='financesummary',
+            name='invoice_total_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='financesummary',
+            name='invoice_total_paid',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_invoice_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+
+def seed_payment_rollups(apps, schema_editor):
+    """Bucket existing payments; afterwards the Payment signals keep this current."""
+    Payment = apps.get_model('finance', 'Payment')
+    PaymentMonthlyRollup = apps.get_model('finance', 'PaymentMonthlyRollup')
+    rows = (
+        Payment.objects.annotate(month=TruncMonth('date_paid', output_field=DateField()))
+        .values('month', 'payment_method', 'student_fee__session', 'student_fee__term')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    PaymentMonthlyRollup.objects.bulk_create(
+        PaymentMonthlyRollup(
+            month=row['month'],
+            payment_method=row['payment_method'],
+            session_id=row['student_fee__session'],
+            term=row['student_fee__term'],
+            total=row['total'] or 0,
+            count=row['count'],
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_remove_attendancesession_classroom_and_more'),
+        ('finance', '0009_invoice_last_modified_deletedinvoice_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(db_index=True)),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('bank_transfer', 'Bank Transfer'), ('mobile_money', 'Mobile Money'), ('cheque', 'Cheque')], max_length=50)),
+                ('term', models.CharField(choices=[('1st', '1st Term'), ('2nd', '2nd Term'), ('3rd', '3rd Term')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='academics.session')),
+            ],
+            options={
+                'ordering': ['-month'],
+                'unique_together': {('month', 'payment_method', 'session', 'term')},
+            },
+        ),
+        migrations.RunPython(seed_payment_rollups, migrations.RunPython.noop),
+    ]
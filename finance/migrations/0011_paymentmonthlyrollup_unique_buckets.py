@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:35
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_sessionless_buckets(apps, schema_editor):
+    """Fold duplicate session-less buckets (the old unique_together let them through) into one."""
+    PaymentMonthlyRollup = apps.get_model("finance", "PaymentMonthlyRollup")
+    duplicates = (
+        PaymentMonthlyRollup.objects.filter(session__isnull=True)
+        .values("month", "payment_method", "term")
+        .annotate(rows=Count("id"), merged_total=Sum("total"), merged_count=Sum("count"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for bucket in duplicates:
+        rows = PaymentMonthlyRollup.objects.filter(
+            session__isnull=True, month=bucket["month"], payment_method=bucket["payment_method"], term=bucket["term"]
+        ).order_by("id")
+        keep = rows.first()
+        rows.exclude(pk=keep.pk).delete()
+        PaymentMonthlyRollup.objects.filter(pk=keep.pk).update(
+            total=bucket["merged_total"], count=bucket["merged_count"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_remove_attendancesession_classroom_and_more'),
+        ('finance', '0010_paymentmonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='paymentmonthlyrollup',
+            unique_together=set(),
+        ),
+        migrations.RunPython(merge_sessionless_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='paymentmonthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('session__isnull', False)), fields=('month', 'payment_method', 'session', 'term'), name='unique_payment_rollup_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentmonthlyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('session__isnull', True)), fields=('month', 'payment_method', 'term'), name='unique_sessionless_payment_rollup_bucket'),
+        ),
+    ]
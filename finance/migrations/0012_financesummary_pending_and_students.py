@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:48
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_pending_and_students(apps, schema_editor):
+    """Seed the new totals so the dashboard doesn't read 0 until the next reconcile."""
+    Invoice = apps.get_model("finance", "Invoice")
+    FinanceSummary = apps.get_model("finance", "FinanceSummary")
+    totals = Invoice.objects.aggregate(
+        pending=Sum("balance", filter=Q(balance__gt=0, total_paid__gt=0)),
+        students=Count("student", distinct=True),
+    )
+    FinanceSummary.objects.update(
+        invoice_total_pending=totals["pending"] or 0,
+        students_with_fees=totals["students"],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_paymentmonthlyrollup_unique_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financesummary',
+            name='invoice_total_pending',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='financesummary',
+            name='students_with_fees',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_pending_and_students, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from django.db import models
 
 # Create your models here.
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
@@ -112,6 +113,44 @@ class Payment(models.Model):
         return f"{self.reference} - ₵{self.amount}"
 
 
+# ===========================
+# 3️⃣b Payment Monthly Rollup
+# ===========================
+class PaymentMonthlyRollup(models.Model):
+    """
+    Payments summed per (month, method, session, term).
+
+    Kept current by the Payment signals; rebuild with
+    `manage.py rebuild_payment_rollups`. Readers should Sum() over matching rows.
+    """
+    month = models.DateField(db_index=True)  # first day of the month, local time
+    payment_method = models.CharField(max_length=50, choices=Payment.PAYMENT_METHODS)
+    session = models.ForeignKey(Session, on_delete=models.SET_NULL, null=True, blank=True)
+    term = models.CharField(max_length=20, choices=StudentFeeRecord.TERM_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-month"]
+        # NULLs never collide in a plain unique index, so session-less
+        # buckets get their own partial constraint.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "payment_method", "session", "term"],
+                condition=Q(session__isnull=False),
+                name="unique_payment_rollup_bucket",
+            ),
+            models.UniqueConstraint(
+                fields=["month", "payment_method", "term"],
+                condition=Q(session__isnull=True),
+                name="unique_sessionless_payment_rollup_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%b %Y} {self.payment_method} ({self.session} - {self.term}): ₵{self.total}"
+
+
 # ===========================
 # 4️⃣ Invoice
 # ===========================
@@ -126,24 +165,13 @@ class Invoice(models.Model):
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     date_issued = models.DateTimeField(auto_now_add=True)
     is_paid = models.BooleanField(default=False)
+    # Drives the invoices_json delta feed (?since=...)
+    last_modified = models.DateTimeField(auto_now=True, db_index=True)
 
     def save(self, *args, **kwargs):
         # 🔹 Auto-generate invoice number only on creation
         if not self.invoice_number:
-            current_year = timezone.now().year
-            last_invoice = (
-                Invoice.objects.filter(invoice_number__startswith=f"INV-{current_year}-")
-                .order_by("id")
-                .last()
-            )
-
-            if last_invoice:
-                last_number = int(last_invoice.invoice_number.split("-")[-1])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-
-            self.invoice_number = f"INV-{current_year}-{new_number:04d}"
+            self.invoice_number = InvoiceSequence.next_invoice_number()
 
         # 🔹 Calculate balance and paid status
         self.balance = self.total_due - self.total_paid
@@ -155,6 +183,54 @@ class Invoice(models.Model):
         return f"{self.invoice_number} - {self.student.user.get_full_name() if hasattr(self.student, 'user') else str(self.student)}"
 
 
+class DeletedInvoice(models.Model):
+    """Tombstone so polling clients of invoices_json learn about deletions."""
+    invoice_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Invoice #{self.invoice_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+# ===========================
+# 4️⃣b Invoice Number Sequence
+# ===========================
+
+class InvoiceSequence(models.Model):
+    """
+    Per-year counter behind INV-<year>-NNNN invoice numbers.
+
+    Allocation locks the year's row, so concurrent workers never hand out the
+    same number, and costs O(1) instead of scanning existing invoice numbers.
+    """
+    year = models.PositiveIntegerField(unique=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+    @staticmethod
+    def format_number(year, number):
+        return f"INV-{year}-{number:04d}"
+
+    @classmethod
+    def allocate(cls, count=1, year=None):
+        """Return `count` consecutive invoice numbers, e.g. for bulk invoicing."""
+        year = year or timezone.now().year
+        with transaction.atomic():
+            cls.objects.get_or_create(year=year)
+            sequence = cls.objects.select_for_update().get(year=year)
+            first = sequence.last_number + 1
+            sequence.last_number += count
+            sequence.save(update_fields=["last_number"])
+        return [cls.format_number(year, number) for number in range(first, first + count)]
+
+    @classmethod
+    def next_invoice_number(cls):
+        """Next number for a single invoice."""
+        return cls.allocate(1)[0]
+
+
 # ===========================
 # 5️⃣ Finance Summary (for dashboard)
 # ===========================
@@ -163,13 +239,26 @@ class FinanceSummary(models.Model):
     total_teachers = models.PositiveIntegerField(default=0)
     total_invoices = models.PositiveIntegerField(default=0)
     total_fees_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Signed (due - paid) so incremental deltas add up; display fees_pending.
     total_fees_pending = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     total_fees_unpaid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Plain invoice totals, as shown on the invoice management page
+    invoice_total_due = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    invoice_total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    invoice_total_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Balance still owed on part-paid invoices, and students with any invoice
+    invoice_total_pending = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    students_with_fees = models.PositiveIntegerField(default=0)
     last_updated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return "Finance Summary"
 
+    @property
+    def fees_pending(self):
+        """Outstanding fees, never below zero (overpayments don't count as credit)."""
+        return max(self.total_fees_pending, 0)
+
     class Meta:
         verbose_name_plural = "Finance Summary"
 # ===========================
@@ -0,0 +1,200 @@
+"""
+PDF renderers for finance reports.
+
+They take plain data instead of a request so the same code serves the
+download views and background report jobs (see reports.jobs).
+"""
+import io
+from io import BytesIO
+
+from django.db.models import Sum
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from accounts.models import Parent
+from .models import Payment
+
+
+# =============================
+# FINANCIAL REPORT
+# =============================
+def financial_report_pdf(report_data):
+    """Render financial report rows (see finance.reports) as PDF bytes."""
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=landscape(A4))
+    width, height = landscape(A4)
+
+    # Title
+    p.setFont("Helvetica-Bold", 16)
+    p.drawCentredString(width / 2, height - 40, "Student Financial Report")
+
+    # Table header
+    y = height - 80
+    p.setFont("Helvetica-Bold", 10)
+    headers = ["Student Name", "Session", "Term", "Total Due", "Total Paid", "Balance", "Status"]
+    x_positions = [40, 180, 300, 400, 480, 560, 640]
+
+    for i, header in enumerate(headers):
+        p.drawString(x_positions[i], y, header)
+
+    # Table rows
+    y -= 20
+    p.setFont("Helvetica", 9)
+    for record in report_data:
+        if y < 50:
+            p.showPage()
+            p.setFont("Helvetica-Bold", 10)
+            y = height - 50
+            for i, header in enumerate(headers):
+                p.drawString(x_positions[i], y, header)
+            y -= 20
+            p.setFont("Helvetica", 9)
+
+        p.drawString(x_positions[0], y, f"{record['student__user__first_name']} {record['student__user__last_name']}")
+        p.drawString(x_positions[1], y, record["session__name"] or "")
+        p.drawString(x_positions[2], y, record["term"])
+        p.drawRightString(x_positions[3] + 40, y, f"{record['total_due']:.2f}")
+        p.drawRightString(x_positions[4] + 40, y, f"{record['total_paid']:.2f}")
+        p.drawRightString(x_positions[5] + 40, y, f"{record['balance']:.2f}")
+        p.drawString(x_positions[6], y, record["status"])
+        y -= 18
+
+    p.save()
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
+
+
+# =============================
+# PARENT PAYMENT HISTORY
+# =============================
+def payment_history_pdf(user):
+    """Payment history of a parent's children as PDF bytes."""
+    parent = Parent.objects.filter(user=user).first()
+    payments = Payment.objects.filter(
+        student_fee__student__in=parent.children.all()
+    ).select_related('student_fee__student', 'received_by')
+
+    # ---- Calculate totals ----
+    child_totals = (
+        payments.values("student_fee__student__user__first_name", "student_fee__student__user__last_name")
+        .annotate(total=Sum("amount"))
+        .order_by("student_fee__student__user__first_name")
+    )
+    total_amount_paid = payments.aggregate(Sum("amount"))["amount__sum"] or 0
+
+    # ---- Prepare PDF ----
+    buffer = io.BytesIO()
+    pdf = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=40,
+        leftMargin=40,
+        topMargin=60,
+        bottomMargin=40,
+    )
+
+    styles = getSampleStyleSheet()
+    elements = []
+
+    # ---- Header ----
+    title_style = ParagraphStyle(
+        "Title",
+        parent=styles["Heading1"],
+        alignment=1,
+        fontSize=16,
+        textColor=colors.HexColor("#1e3a8a"),
+        spaceAfter=20,
+    )
+    subtitle_style = ParagraphStyle(
+        "Subtitle",
+        parent=styles["Normal"],
+        alignment=1,
+        fontSize=10,
+        textColor=colors.grey,
+        spaceAfter=15,
+    )
+
+    elements.append(Paragraph("💰 Payment History Report", title_style))
+    elements.append(Paragraph(
+        f"Parent: <b>{user.get_full_name()}</b> &nbsp;&nbsp; | &nbsp;&nbsp; Generated on: {timezone.now().strftime('%b %d, %Y, %I:%M %p')}",
+        subtitle_style,
+    ))
+    elements.append(Spacer(1, 12))
+
+    # ---- Payment Table ----
+    table_data = [["#", "Child", "Amount (₵)", "Method", "Reference", "Date", "Received By"]]
+    for i, p in enumerate(payments, 1):
+        table_data.append([
+            str(i),
+            p.student_fee.student.user.get_full_name(),
+            f"{p.amount:.2f}",
+            p.get_payment_method_display(),
+            p.reference or "-",
+            timezone.localtime(p.date_paid).strftime("%b %d, %Y"),
+            p.received_by.get_username() if p.received_by else "N/A",
+        ])
+
+    table = Table(table_data, repeatRows=1, hAlign="LEFT", colWidths=[30, 100, 70, 70, 80, 80, 80])
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e3a8a")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    elements.append(table)
+    elements.append(Spacer(1, 20))
+
+    # ---- Summary by Child ----
+    if child_totals:
+        elements.append(Paragraph("🧾 Summary by Child", ParagraphStyle(
+            "Header2", parent=styles["Heading2"], textColor=colors.HexColor("#1e3a8a"), spaceAfter=10,
+        )))
+        child_table_data = [["Child", "Total Paid (₵)"]]
+        for c in child_totals:
+            full_name = f"{c['student_fee__student__user__first_name']} {c['student_fee__student__user__last_name']}"
+            child_table_data.append([full_name, f"{c['total']:.2f}"])
+
+        child_table = Table(child_table_data, repeatRows=1, colWidths=[200, 120])
+        child_table.setStyle(TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e3a8a")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+            ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ]))
+        elements.append(child_table)
+        elements.append(Spacer(1, 20))
+
+    # ---- Overall Summary ----
+    elements.append(Paragraph("💰 Overall Summary", ParagraphStyle(
+        "Header2", parent=styles["Heading2"], textColor=colors.HexColor("#1e3a8a"), spaceAfter=10,
+    )))
+
+    summary_data = [
+        ["Total Payments Made", str(payments.count())],
+        ["Total Amount Paid", f"₵{total_amount_paid:.2f}"],
+    ]
+    summary_table = Table(summary_data, colWidths=[200, 150])
+    summary_table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eef2ff")),
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+    ]))
+    elements.append(summary_table)
+
+    # ---- Build PDF ----
+    pdf.build(elements)
+    return buffer.getvalue()
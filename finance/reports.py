@@ -0,0 +1,223 @@
+"""
+Shared query builder for the financial report and its Excel/PDF exports.
+
+All three views read the same aggregate rows; results are cached briefly per
+filter combination and finance version, so exporting right after viewing
+reuses the work and any fee or payment write invalidates it.
+"""
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from SMS.versioning import get_versions
+from .models import StudentFeeRecord
+from .signals import FINANCE_VERSION_SCOPE
+
+REPORT_PAGE_SIZE = 100
+REPORT_CACHE_TIMEOUT = 60  # seconds
+REPORT_STREAM_CHUNK = 2000
+
+REPORT_EXPORT_HEADERS = ["Student ID", "Student Name", "Session", "Term", "Total Due", "Total Paid", "Balance", "Status"]
+
+# Keyset ordering: every column is a group key, so the tuple is unique per row.
+REPORT_ORDERING = ("student__user__first_name", "student", "session_key", "term")
+
+REPORT_FILTER_PARAMS = ("session", "term", "status", "search")
+
+REPORT_STATUS_FILTERS = {
+    "overpaid": Q(balance__lt=0),
+    "cleared": Q(balance=0),
+    "owing": Q(balance__gt=0),
+}
+
+
+def report_filters(request):
+    """Normalised filter parameters from the query string."""
+    return {param: (request.GET.get(param) or "").strip() for param in REPORT_FILTER_PARAMS}
+
+
+def financial_report_queryset(filters):
+    """
+    One aggregate row per (student, session, term) with totals, status and the
+    student's registration number, all filters applied in SQL.
+    """
+    records = StudentFeeRecord.objects.all()
+    if filters.get("session"):
+        records = records.filter(session_id=filters["session"])
+    if filters.get("term"):
+        records = records.filter(term=filters["term"])
+    if filters.get("search"):  # ✅ search by student ID instead of name
+        records = records.filter(student__student_id__icontains=filters["search"])
+
+    report_data = (
+        records.values(
+            "student",
+            "student__student_id",
+            "student__user__first_name",
+            "student__user__last_name",
+            "session__name",
+            "term",
+        )
+        .annotate(
+            session_key=Coalesce("session", Value(0)),
+            total_due=Sum("total_amount"),
+            total_paid=Sum("amount_paid"),
+            balance=Sum(F("total_amount") - F("amount_paid")),
+            status=Case(
+                When(balance__lt=0, then=Value("Overpaid")),
+                When(balance=0, then=Value("Cleared")),
+                default=Value("Owing"),
+                output_field=CharField(),
+            ),
+        )
+        .order_by(*REPORT_ORDERING)
+    )
+
+    # Status is derived from the balance sign, so this becomes a HAVING clause.
+    status = (filters.get("status") or "").lower()
+    if status in REPORT_STATUS_FILTERS:
+        report_data = report_data.filter(REPORT_STATUS_FILTERS[status])
+    return report_data
+
+
+# ===========================
+# 🔹 Caching
+# ===========================
+def _cache_key(kind, filters, cursor=""):
+    version = get_versions([FINANCE_VERSION_SCOPE])[FINANCE_VERSION_SCOPE]
+    digest = hashlib.md5(
+        json.dumps([filters, cursor, version], sort_keys=True).encode()
+    ).hexdigest()
+    return f"finance:report:{kind}:{digest}"
+
+
+def financial_report_rows(filters):
+    """Every report row for `filters` (used by the exports), cached briefly."""
+    key = _cache_key("rows", filters)
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(financial_report_queryset(filters))
+        cache.set(key, rows, REPORT_CACHE_TIMEOUT)
+    return rows
+
+
+def iter_financial_report_rows(filters, chunk_size=REPORT_STREAM_CHUNK):
+    """
+    Yield report rows without materialising the whole result: reuse the cached
+    rows when present, otherwise stream from a server-side cursor.
+    """
+    rows = cache.get(_cache_key("rows", filters))
+    if rows is not None:
+        return iter(rows)
+    return financial_report_queryset(filters).iterator(chunk_size=chunk_size)
+
+
+def export_row(record):
+    """Flat row matching REPORT_EXPORT_HEADERS."""
+    return [
+        record["student__student_id"],
+        f"{record['student__user__first_name']} {record['student__user__last_name']}".strip(),
+        record["session__name"] or "",
+        record["term"],
+        record["total_due"],
+        record["total_paid"],
+        record["balance"],
+        record["status"],
+    ]
+
+
+def financial_report_page(filters, cursor=None, page_size=REPORT_PAGE_SIZE):
+    """
+    One keyset page of report rows: (rows, next_cursor).
+
+    A first page that holds the whole result also primes the full-rows cache,
+    so exporting the report just viewed needs no further query.
+    """
+    key = _cache_key("page", filters, cursor or "")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    full_rows = cache.get(_cache_key("rows", filters))
+    if full_rows is not None:
+        page = _rows_after_in_memory(full_rows, cursor)[:page_size + 1]
+    else:
+        report_data = financial_report_queryset(filters)
+        if cursor:
+            report_data = rows_after(report_data, cursor)
+        # Fetch one extra row to know whether there is a next page.
+        page = list(report_data[:page_size + 1])
+
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor(page[-1])
+    elif not cursor and full_rows is None:
+        cache.set(_cache_key("rows", filters), page, REPORT_CACHE_TIMEOUT)
+
+    cache.set(key, (page, next_cursor), REPORT_CACHE_TIMEOUT)
+    return page, next_cursor
+
+
+# ===========================
+# 🔹 Keyset pagination
+# ===========================
+def encode_cursor(record):
+    values = [record[field] for field in REPORT_ORDERING]
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _cursor_text(value):
+    if not isinstance(value, str):
+        raise TypeError(value)
+    return value
+
+
+def _cursor_id(value):
+    value = int(value)
+    if not 0 <= value < 2 ** 63:
+        raise ValueError(value)
+    return value
+
+
+# One checker per REPORT_ORDERING column: first name, student id, session key, term.
+REPORT_CURSOR_TYPES = (_cursor_text, _cursor_id, _cursor_id, _cursor_text)
+
+
+def decode_cursor(cursor):
+    """The ordering values from `cursor`, or None if it is malformed or mistyped."""
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(REPORT_CURSOR_TYPES):
+            return None
+        return [check(value) for check, value in zip(REPORT_CURSOR_TYPES, values)]
+    except (AttributeError, OverflowError, TypeError, ValueError):
+        return None
+
+
+def rows_after(report_data, cursor):
+    """Rows strictly after the encoded ordering tuple."""
+    values = decode_cursor(cursor)
+    if values is None:
+        return report_data
+
+    after = Q()
+    for i, field in enumerate(REPORT_ORDERING):
+        equal_prefix = dict(zip(REPORT_ORDERING[:i], values[:i]))
+        after |= Q(**equal_prefix, **{f"{field}__gt": values[i]})
+    return report_data.filter(after)
+
+
+def _rows_after_in_memory(rows, cursor):
+    """Slice an already-ordered row list just past the cursor row."""
+    values = decode_cursor(cursor) if cursor else None
+    if values is None:
+        return rows
+    for position, row in enumerate(rows):
+        if [row[field] for field in REPORT_ORDERING] == values:
+            return rows[position + 1:]
+    return []
@@ -0,0 +1,7 @@
+# finance/routing.py
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    re_path(r"ws/finance/$", consumers.FinanceConsumer.as_asgi()),
+]
@@ -1,49 +1,249 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
 from django.db.models import Sum
-from django.utils.crypto import get_random_string
-from .models import Payment, Invoice, StudentFeeRecord, FinanceSummary,BulkFeeAssignment
+from django.utils import timezone
+from .models import Payment, Invoice, StudentFeeRecord, FinanceSummary,BulkFeeAssignment, DeletedInvoice, FeeType
+from .utils import (
+    apply_finance_summary_delta,
+    apply_payment_rollup_delta,
+    assign_fee_to_students,
+    payment_rollup_key,
+)
+from .feeds import DELETED_INVOICE_RETENTION
+from .live import queue_finance_update
 from academics.models import Session, ClassRoom
+from SMS.versioning import CommitBatch, bump_version
+from accounts.metrics import bump_student_versions
 from accounts.models import CustomUser, Student, Teacher
 
 
 # ======================================================
-# 🔹 Centralized Finance Summary Updater
+# 🔹 Incremental Finance Summary (signed deltas)
 # ======================================================
-def update_finance_summary():
-    """Recalculate and update FinanceSummary totals."""
-    summary, _ = FinanceSummary.objects.get_or_create(id=1)
+# Each tracked model contributes a fixed set of amounts to FinanceSummary.
+# On save we apply (new contribution - old contribution); on delete we subtract
+# the old contribution. One PK lookup + one UPDATE per write, no table scans.
+def _payment_contribution(payment):
+    amount = payment.amount or 0
+    return {"total_fees_paid": amount, "total_fees_pending": -amount}
 
-    # ====== Users and Invoices ======
-    summary.total_students = CustomUser.objects.filter(role="student").count()
-    summary.total_teachers = CustomUser.objects.filter(role="teacher").count()
-    summary.total_invoices = Invoice.objects.count()
 
-    # ====== Fees and Payments ======
-    total_paid = Payment.objects.aggregate(total=Sum("amount"))["total"] or 0
-    total_due = Invoice.objects.aggregate(total=Sum("total_due"))["total"] or 0
-    total_unpaid = Invoice.objects.filter(is_paid=False).aggregate(total=Sum("balance"))["total"] or 0
+def _invoice_contribution(invoice):
+    return {
+        "total_invoices": 1,
+        "total_fees_pending": invoice.total_due or 0,
+        "total_fees_unpaid": 0 if invoice.is_paid else (invoice.balance or 0),
+        "invoice_total_due": invoice.total_due or 0,
+        "invoice_total_paid": invoice.total_paid or 0,
+        "invoice_total_balance": invoice.balance or 0,
+        "invoice_total_pending": invoice.balance if (invoice.balance or 0) > 0 and (invoice.total_paid or 0) > 0 else 0,
+    }
 
-    # ====== Calculate pending balance ======
-    summary.total_fees_paid = total_paid
-    summary.total_fees_pending = max(total_due - total_paid, 0)
-    summary.total_fees_unpaid = total_unpaid
 
-    summary.save()
+def _user_contribution(user):
+    return {
+        "total_students": 1 if user.role == "student" else 0,
+        "total_teachers": 1 if user.role == "teacher" else 0,
+    }
+
+
+SUMMARY_CONTRIBUTIONS = {
+    Payment: (_payment_contribution, {"amount"}),
+    Invoice: (_invoice_contribution, {"total_due", "total_paid", "balance", "is_paid", "student"}),
+    CustomUser: (_user_contribution, {"role"}),
+}
+
+
+def _subtract(new, old):
+    return {field: new.get(field, 0) - old.get(field, 0) for field in set(new) | set(old)}
+
+
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=CustomUser)
+def remember_summary_contribution(sender, instance, update_fields=None, **kwargs):
+    """Snapshot the stored row's contribution before it is overwritten."""
+    contribution, tracked_fields = SUMMARY_CONTRIBUTIONS[sender]
+    instance._summary_contribution = {}
+    instance._summary_previous = None
+    if update_fields is not None and not tracked_fields.intersection(update_fields):
+        # e.g. last_login updates: nothing we track can change.
+        instance._summary_contribution = None
+        return
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).first()
+        if previous is not None:
+            instance._summary_contribution = contribution(previous)
+            instance._summary_previous = previous
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=CustomUser)
+def update_finance_summary_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, "_summary_contribution", {})
+    if previous is None:
+        return
+    contribution, _ = SUMMARY_CONTRIBUTIONS[sender]
+    apply_finance_summary_delta(_subtract(contribution(instance), previous))
+
+
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=CustomUser)
+def update_finance_summary_on_delete(sender, instance, **kwargs):
+    contribution, _ = SUMMARY_CONTRIBUTIONS[sender]
+    apply_finance_summary_delta(_subtract({}, contribution(instance)))
+
+
+# students_with_fees is a distinct count, so it can't be summed per invoice.
+# Before the first invoice write for a student in a transaction we record
+# whether they had any invoice; after commit each of those students is checked
+# again and the difference applied. Cascade deletes of several invoices then
+# count the student once.
+def _students_with_fees_delta(had_invoices):
+    still_have = set(
+        Invoice.objects.filter(student_id__in=list(had_invoices)).values_list("student_id", flat=True).distinct()
+    )
+    apply_finance_summary_delta({
+        "students_with_fees": sum(
+            (student_id in still_have) - had for student_id, had in had_invoices.items()
+        )
+    })
+
+
+_invoiced_students = CommitBatch(dict, _students_with_fees_delta)
+
+
+def _remember_invoiced_student(student_id):
+    # Only recorded here: pre_save runs outside the save's transaction, so
+    # the flush is scheduled from post_save/post_delete.
+    had_invoices = _invoiced_students.pending()
+    if student_id and student_id not in had_invoices:
+        had_invoices[student_id] = Invoice.objects.filter(student_id=student_id).exists()
+
+
+@receiver(pre_save, sender=Invoice)
+def remember_invoiced_student_on_save(sender, instance, **kwargs):
+    """Runs after remember_summary_contribution, which loaded the stored row."""
+    previous = instance._summary_previous
+    if instance._state.adding:
+        _remember_invoiced_student(instance.student_id)
+    elif previous is not None and previous.student_id != instance.student_id:
+        # Admin edits can move an invoice to another student
+        _remember_invoiced_student(previous.student_id)
+        _remember_invoiced_student(instance.student_id)
+
+
+@receiver(pre_delete, sender=Invoice)
+def remember_invoiced_student_on_delete(sender, instance, **kwargs):
+    _remember_invoiced_student(instance.student_id)
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def recount_invoiced_students(sender, instance, **kwargs):
+    _invoiced_students.schedule()
 
 
 # ======================================================
-# 🔹 Auto-update summary when key models change
+# 🔹 PaymentMonthlyRollup (per-bucket deltas)
 # ======================================================
+@receiver(pre_save, sender=Payment)
+def remember_payment_rollup(sender, instance, **kwargs):
+    """Snapshot the stored payment's bucket and amount before it changes."""
+    instance._rollup_previous = None
+    if instance.pk:
+        previous = Payment.objects.select_related("student_fee").filter(pk=instance.pk).first()
+        if previous is not None:
+            instance._rollup_previous = (payment_rollup_key(previous), previous.amount or 0)
+
+
 @receiver(post_save, sender=Payment)
+def update_payment_rollup_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, "_rollup_previous", None)
+    key, amount = payment_rollup_key(instance), instance.amount or 0
+    if previous is not None:
+        if previous == (key, amount):
+            return
+        apply_payment_rollup_delta(previous[0], -previous[1], -1)
+    apply_payment_rollup_delta(key, amount, 1)
+
+
 @receiver(post_delete, sender=Payment)
+def update_payment_rollup_on_delete(sender, instance, **kwargs):
+    apply_payment_rollup_delta(payment_rollup_key(instance), -(instance.amount or 0), -1)
+
+
+# ======================================================
+# 🔹 Version bump for conditional GETs (finance_summary_json, invoices_json)
+# ======================================================
+FINANCE_VERSION_SCOPE = "finance"
+
+
+@receiver(post_save, sender=FeeType)
+@receiver(post_save, sender=StudentFeeRecord)
+@receiver(post_save, sender=BulkFeeAssignment)
+@receiver(post_save, sender=Payment)
 @receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=FinanceSummary)
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=FeeType)
+@receiver(post_delete, sender=StudentFeeRecord)
+@receiver(post_delete, sender=BulkFeeAssignment)
+@receiver(post_delete, sender=Payment)
 @receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=FinanceSummary)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=CustomUser)
+def bump_finance_version(sender, instance, update_fields=None, **kwargs):
+    if sender is CustomUser and update_fields is not None and "role" not in update_fields:
+        return  # e.g. last_login on every sign-in
+    bump_version(FINANCE_VERSION_SCOPE)
+
+
+# 🔹 Invalidate the cached student dashboard snapshot
 @receiver(post_save, sender=StudentFeeRecord)
+@receiver(post_save, sender=Invoice)
 @receiver(post_delete, sender=StudentFeeRecord)
-def update_finance_summary_on_change(sender, instance, **kwargs):
-    """Trigger summary recalculation on relevant model changes."""
-    update_finance_summary()
+@receiver(post_delete, sender=Invoice)
+def bump_student_dashboard_on_fees(sender, instance, **kwargs):
+    bump_student_versions([instance.student_id])
+
+
+# ======================================================
+# 🔹 Live push to connected finance dashboards (ws/finance/)
+# ======================================================
+@receiver(post_save, sender=Invoice)
+def push_saved_invoice(sender, instance, **kwargs):
+    queue_finance_update(invoice_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Invoice)
+def push_deleted_invoice(sender, instance, **kwargs):
+    queue_finance_update(deleted_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def push_payment_change(sender, instance, **kwargs):
+    queue_finance_update()
+
+
+@receiver(post_save, sender=FinanceSummary)
+def push_reconciled_summary(sender, instance, **kwargs):
+    # Full reconciles follow bulk writes that bypass the Invoice signals.
+    queue_finance_update(resync=True)
+
+
+# ======================================================
+# 🔹 Invoice tombstones for the invoices_json delta feed
+# ======================================================
+@receiver(post_delete, sender=Invoice)
+def record_deleted_invoice(sender, instance, **kwargs):
+    DeletedInvoice.objects.create(invoice_id=instance.pk)
+    DeletedInvoice.objects.filter(deleted_at__lt=timezone.now() - DELETED_INVOICE_RETENTION).delete()
 
 
 # ======================================================
@@ -74,7 +274,6 @@ def update_or_create_invoice(sender, instance, **kwargs):
         session=instance.session,
         term=instance.term,
         defaults={
-            "invoice_number": f"INV-{get_random_string(8).upper()}",
             "total_due": 0,
             "total_paid": 0,
             "balance": 0,
@@ -82,14 +281,14 @@ def update_or_create_invoice(sender, instance, **kwargs):
     )
 
     # 🔹 Recalculate all fee records for that student/session/term
-    records = StudentFeeRecord.objects.filter(
+    totals = StudentFeeRecord.objects.filter(
         student=instance.student,
         session=instance.session,
         term=instance.term,
-    )
+    ).aggregate(total_due=Sum("total_amount"), total_paid=Sum("amount_paid"))
 
-    total_due = sum(record.total_amount for record in records)
-    total_paid = sum(record.amount_paid for record in records)
+    total_due = totals["total_due"] or 0
+    total_paid = totals["total_paid"] or 0
     balance = total_due - total_paid
 
     invoice.total_due = total_due
@@ -103,9 +302,6 @@ def update_or_create_invoice(sender, instance, **kwargs):
 # ======================================================
 # 🔹 Auto-create StudentFeeRecord when BulkFeeAssignment is created
 # ======================================================
-
-from django.db import IntegrityError
-
 @receiver(post_save, sender=BulkFeeAssignment)
 def create_fee_records_for_students(sender, instance, created, **kwargs):
     if created:
@@ -114,19 +310,7 @@ def create_fee_records_for_students(sender, instance, created, **kwargs):
         else:
             students = Student.objects.all()
 
-        for student in students:
-            try:
-                # Only create if not already existing for this student/session/term/fee_type
-                StudentFeeRecord.objects.get_or_create(
-                    student=student,
-                    fee_type=instance.fee_type,
-                    session=instance.session,
-                    term=instance.term,
-                    defaults={
-                        "total_amount": instance.total_amount,
-                        "amount_paid": 0,
-                    },
-                )
-            except IntegrityError:
-                # In case of a rare race condition, just skip gracefully
-                continue
+        # Counts are read back by the bulk_fee_assignment view.
+        instance.records_created, instance.records_skipped = assign_fee_to_students(
+            students, instance.fee_type, instance.session, instance.term, instance.total_amount
+        )
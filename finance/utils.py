@@ -1,32 +1,254 @@
-from django.db.models import Sum, Count
-from accounts.models import Student, Teacher
-from .models import Invoice, FinanceSummary
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from accounts.metrics import bump_student_versions
+from accounts.models import CustomUser
+from .models import Invoice, InvoiceSequence, Payment, PaymentMonthlyRollup, FinanceSummary, StudentFeeRecord
+
+# The dashboard summary is a single row.
+SUMMARY_ID = 1
+
+SUMMARY_FIELDS = (
+    "total_students",
+    "total_teachers",
+    "total_invoices",
+    "total_fees_paid",
+    "total_fees_pending",
+    "total_fees_unpaid",
+    "invoice_total_due",
+    "invoice_total_paid",
+    "invoice_total_balance",
+    "invoice_total_pending",
+    "students_with_fees",
+)
+
 
 def update_finance_summary():
     """
-    Refreshes the FinanceSummary totals based on current financial data.
+    Full reconciliation: recompute every FinanceSummary total from scratch.
+
+    Signals keep the row current with O(1) deltas (see apply_finance_summary_delta);
+    this is the slow path used to create the row and to correct drift left by
+    queryset.update()/bulk writes (`manage.py reconcile_finance_summary`).
     """
-    summary, _ = FinanceSummary.objects.get_or_create(id=1)
+    summary, _ = FinanceSummary.objects.get_or_create(id=SUMMARY_ID)
 
-    total_students = Student.objects.count()
-    total_teachers = Teacher.objects.count()
-    total_invoices = Invoice.objects.count()
+    # ====== Users and Invoices ======
+    summary.total_students = CustomUser.objects.filter(role="student").count()
+    summary.total_teachers = CustomUser.objects.filter(role="teacher").count()
+    summary.total_invoices = Invoice.objects.count()
 
-    # Aggregate payment data
-    total_paid = Invoice.objects.aggregate(total=Sum("total_paid"))["total"] or 0
+    # ====== Fees and Payments ======
+    total_paid = Payment.objects.aggregate(total=Sum("amount"))["total"] or 0
     total_due = Invoice.objects.aggregate(total=Sum("total_due"))["total"] or 0
-    total_balance = Invoice.objects.aggregate(total=Sum("balance"))["total"] or 0
-
-    # Split between paid/pending/unpaid
-    fully_paid = Invoice.objects.filter(is_paid=True).count()
-    partially_paid = Invoice.objects.filter(is_paid=False, total_paid__gt=0).count()
-    unpaid = Invoice.objects.filter(total_paid=0).count()
+    total_unpaid = Invoice.objects.filter(is_paid=False).aggregate(total=Sum("balance"))["total"] or 0
+    invoice_totals = Invoice.objects.aggregate(
+        paid_total=Sum("total_paid"),
+        balance_total=Sum("balance"),
+        pending=Sum("balance", filter=Q(balance__gt=0, total_paid__gt=0)),
+        students=Count("student", distinct=True),
+    )
 
-    # Update the summary table
-    summary.total_students = total_students
-    summary.total_teachers = total_teachers
-    summary.total_invoices = total_invoices
     summary.total_fees_paid = total_paid
-    summary.total_fees_pending = total_balance  # pending = total balance left
-    summary.total_fees_unpaid = total_due - total_paid
+    # Signed running value so signal deltas stay additive; read it through
+    # FinanceSummary.fees_pending, which clamps at zero.
+    summary.total_fees_pending = total_due - total_paid
+    summary.total_fees_unpaid = total_unpaid
+    summary.invoice_total_due = total_due
+    summary.invoice_total_paid = invoice_totals["paid_total"] or 0
+    summary.invoice_total_balance = invoice_totals["balance_total"] or 0
+    summary.invoice_total_pending = invoice_totals["pending"] or 0
+    summary.students_with_fees = invoice_totals["students"]
+
     summary.save()
+    return summary
+
+
+def apply_finance_summary_delta(delta):
+    """
+    Apply signed deltas ({field: amount}) to the summary row in one UPDATE.
+
+    F-expressions keep concurrent writers from overwriting each other. If the
+    row does not exist yet, fall back to a full reconciliation.
+    """
+    changes = {field: amount for field, amount in delta.items() if amount}
+    if not changes:
+        return
+
+    updates = {field: F(field) + amount for field, amount in changes.items()}
+    updates["last_updated"] = timezone.now()
+
+    if not FinanceSummary.objects.filter(id=SUMMARY_ID).update(**updates):
+        update_finance_summary()
+
+
+# ======================================================
+# 🔹 Bulk invoice refresh
+# ======================================================
+# Keeps `student_id__in` lists well under database parameter limits.
+INVOICE_REFRESH_CHUNK = 500
+
+
+def refresh_invoices(invoice_keys):
+    """
+    Bring the invoices for the given (student_id, session_id, term) keys in line
+    with their fee records: one grouped aggregate, one invoice fetch, then
+    bulk_update/bulk_create, per chunk of students.
+
+    Bypasses Invoice signals; callers are expected to reconcile the summary.
+    Returns (created, updated) counts.
+    """
+    invoice_keys = set(invoice_keys)
+    student_ids = sorted({student_id for student_id, _, _ in invoice_keys})
+    created = updated = 0
+
+    for start in range(0, len(student_ids), INVOICE_REFRESH_CHUNK):
+        chunk = set(student_ids[start:start + INVOICE_REFRESH_CHUNK])
+
+        totals = {
+            (row["student_id"], row["session_id"], row["term"]): (row["total_due"], row["total_paid"])
+            for row in StudentFeeRecord.objects.filter(student_id__in=chunk)
+            .values("student_id", "session_id", "term")
+            .annotate(total_due=Sum("total_amount"), total_paid=Sum("amount_paid"))
+            .order_by()
+        }
+        existing = {
+            (invoice.student_id, invoice.session_id, invoice.term): invoice
+            for invoice in Invoice.objects.filter(student_id__in=chunk)
+        }
+
+        to_create, to_update = [], []
+        for key in invoice_keys:
+            if key[0] not in chunk or key not in totals:
+                continue
+            total_due, total_paid = totals[key]
+            invoice = existing.get(key)
+            if invoice is None:
+                invoice = Invoice(student_id=key[0], session_id=key[1], term=key[2])
+                to_create.append(invoice)
+            else:
+                to_update.append(invoice)
+            invoice.total_due = total_due
+            invoice.total_paid = total_paid
+            invoice.balance = total_due - total_paid
+            invoice.is_paid = invoice.balance <= 0
+            invoice.last_modified = timezone.now()  # bulk_update skips auto_now
+
+        # bulk_create skips Invoice.save(), so number the new invoices in one block.
+        if to_create:
+            for invoice, number in zip(to_create, InvoiceSequence.allocate(len(to_create))):
+                invoice.invoice_number = number
+        Invoice.objects.bulk_create(to_create, batch_size=INVOICE_REFRESH_CHUNK)
+        Invoice.objects.bulk_update(
+            to_update, ["total_due", "total_paid", "balance", "is_paid", "last_modified"],
+            batch_size=INVOICE_REFRESH_CHUNK,
+        )
+        created += len(to_create)
+        updated += len(to_update)
+
+    # bulk writes skip the signals that invalidate student dashboards.
+    bump_student_versions(student_ids)
+    return created, updated
+
+
+# ======================================================
+# 🔹 Set-based fee assignment
+# ======================================================
+FEE_RECORD_CHUNK = 1000
+
+
+def assign_fee_to_students(students, fee_type, session, term, total_amount):
+    """
+    Create one StudentFeeRecord per student for (fee_type, session, term),
+    skipping students who already have one, then bring their invoices and the
+    summary up to date.
+
+    A fixed number of queries per chunk instead of a get_or_create per
+    student. Returns (created_count, skipped_count).
+    """
+    student_ids = list(students.values_list("id", flat=True))
+    existing_records = StudentFeeRecord.objects.filter(fee_type=fee_type, session=session, term=term)
+
+    with transaction.atomic():
+        already_assigned = set(existing_records.values_list("student_id", flat=True))
+        new_records = [
+            # bulk_create skips save(), so balance/is_cleared are set here.
+            StudentFeeRecord(
+                student_id=student_id,
+                fee_type=fee_type,
+                session=session,
+                term=term,
+                total_amount=total_amount,
+                amount_paid=0,
+                balance=total_amount,
+                is_cleared=total_amount <= 0,
+            )
+            for student_id in student_ids
+            if student_id not in already_assigned
+        ]
+        StudentFeeRecord.objects.bulk_create(new_records, batch_size=FEE_RECORD_CHUNK, ignore_conflicts=True)
+
+        # ignore_conflicts hides rows lost to a concurrent insert; count what landed.
+        created_count = existing_records.count() - len(already_assigned) if new_records else 0
+        skipped_count = len(student_ids) - created_count
+
+        if new_records:
+            session_id = session.pk if session else None
+            refresh_invoices({(record.student_id, session_id, term) for record in new_records})
+            update_finance_summary()
+
+    return created_count, skipped_count
+
+
+# ======================================================
+# 🔹 Monthly payment rollups
+# ======================================================
+def payment_rollup_key(payment):
+    """(month, payment_method, session_id, term) bucket a payment is counted in."""
+    fee_record = payment.student_fee
+    month = timezone.localtime(payment.date_paid).date().replace(day=1)
+    return (month, payment.payment_method, fee_record.session_id, fee_record.term)
+
+
+def apply_payment_rollup_delta(key, amount, count):
+    """Add amount/count to one rollup bucket with an F() UPDATE, creating it if missing."""
+    if not amount and not count:
+        return
+    month, payment_method, session_id, term = key
+    bucket = PaymentMonthlyRollup.objects.filter(
+        month=month, payment_method=payment_method, session_id=session_id, term=term
+    )
+    if bucket.update(total=F("total") + amount, count=F("count") + count):
+        return
+    try:
+        with transaction.atomic():
+            PaymentMonthlyRollup.objects.create(
+                month=month, payment_method=payment_method, session_id=session_id, term=term,
+                total=amount, count=count,
+            )
+    except IntegrityError:
+        # Lost the race to create the bucket; it exists now.
+        bucket.update(total=F("total") + amount, count=F("count") + count)
+
+
+def rebuild_payment_rollups():
+    """Recompute every rollup bucket from Payment in one grouped query. Returns the bucket count."""
+    with transaction.atomic():
+        buckets = [
+            PaymentMonthlyRollup(
+                month=row["month"],
+                payment_method=row["payment_method"],
+                session_id=row["student_fee__session"],
+                term=row["student_fee__term"],
+                total=row["total"] or 0,
+                count=row["count"],
+            )
+            for row in Payment.objects.annotate(month=TruncMonth("date_paid", output_field=DateField()))
+            .values("month", "payment_method", "student_fee__session", "student_fee__term")
+            .annotate(total=Sum("amount"), count=Count("id"))
+            .order_by()
+        ]
+        PaymentMonthlyRollup.objects.all().delete()
+        PaymentMonthlyRollup.objects.bulk_create(buckets, batch_size=FEE_RECORD_CHUNK)
+    return len(buckets)
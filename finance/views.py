@@ -6,35 +6,44 @@
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import F, Sum
-from django.http import HttpResponse, JsonResponse
+from django.db.models import Sum
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
 
 # Python Standard Library
-import io
 import os
 import csv
+import itertools
+import tempfile
 from datetime import datetime
-from io import BytesIO
 
 # Third-Party Libraries
-import pandas as pd
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.units import inch
+from openpyxl import Workbook
+from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
 # Project-Level Imports
-from .models import FinanceSummary, Invoice, Payment, StudentFeeRecord, FeeType, BulkFeeAssignment
+from .models import Invoice, Payment, StudentFeeRecord, FeeType, BulkFeeAssignment
 from .forms import FeeTypeForm, BulkFeeForm, StudentFeeForm, PaymentForm,BulkFeeCreationForm
 from academics.models import Session
 from accounts.models import Student, Teacher 
 from accounts.models import Parent
-from .utils import update_finance_summary
+from .utils import assign_fee_to_students
+from .pdf import financial_report_pdf, payment_history_pdf
+from .signals import FINANCE_VERSION_SCOPE
+from SMS.versioning import conditional_on_versions
+from .feeds import finance_summary_data, invoice_changes, invoice_feed_page_size, invoice_summary
+from reports.views import enqueue_report_response
+from .reports import (
+    REPORT_EXPORT_HEADERS,
+    export_row,
+    financial_report_page,
+    financial_report_rows,
+    iter_financial_report_rows,
+    report_filters,
+)
 
 
 
@@ -47,20 +56,16 @@ def manage_invoices(request):
     The template can auto-refresh via the invoices_json endpoint.
     """
     # Efficient queryset: prefetch related data and order by latest issued
-    invoices = Invoice.objects.select_related("student", "session").order_by("-date_issued")
+    invoices = Invoice.objects.select_related("student__user", "session").order_by("-date_issued")
 
-    # Compute summary safely
-    aggregates = invoices.aggregate(
-        total_due=Sum("total_due"),
-        total_paid=Sum("total_paid"),
-        total_balance=Sum("balance")
-    )
+    # Totals are maintained incrementally on FinanceSummary
+    summary = invoice_summary()
 
     context = {
         "invoices": invoices,
-        "total_due": aggregates["total_due"] or 0,
-        "total_paid": aggregates["total_paid"] or 0,
-        "total_balance": aggregates["total_balance"] or 0,
+        "total_due": summary["total_due"],
+        "total_paid": summary["total_paid"],
+        "total_balance": summary["total_balance"],
     }
 
     return render(request, "finance/manage_invoices.html", context)
@@ -102,10 +107,7 @@ def record_payment(request):
             # 🔹 Automatically set the receiver to the logged-in user
             payment.received_by = request.user 
             # 🔹 Save the payment record
-            payment.save()
-
-            # 🔹 Update finance summary dynamically
-            update_finance_summary()
+            payment.save()  # FinanceSummary is kept current by finance.signals
 
             messages.success(request, "Payment recorded successfully.")
             return redirect("manage_invoices")
@@ -116,101 +118,30 @@ def record_payment(request):
 
 
 
-#===========================
-# 🔁 Finance Summary Updater
-#===========================
-def update_finance_summary():
-    """Recalculate and refresh the FinanceSummary after any payment."""
-    # Aggregate data from StudentFeeRecord
-    total_students = StudentFeeRecord.objects.values("student").distinct().count()
-    total_due = StudentFeeRecord.objects.aggregate(total=Sum("total_amount"))["total"] or 0
-    total_paid = StudentFeeRecord.objects.aggregate(total=Sum("amount_paid"))["total"] or 0
-    total_balance = StudentFeeRecord.objects.aggregate(total=Sum("balance"))["total"] or 0
-
-    fully_paid = StudentFeeRecord.objects.filter(is_cleared=True).count()
-    partially_paid = StudentFeeRecord.objects.filter(amount_paid__gt=0, is_cleared=False).count()
-    unpaid = StudentFeeRecord.objects.filter(amount_paid=0).count()
-
-    # Get or create the single summary record
-    summary, _ = FinanceSummary.objects.get_or_create(id=1)
-
-    # Update fields (match your model names)
-    summary.total_students = total_students
-    summary.total_invoices = Invoice.objects.count()
-    summary.total_fees_paid = total_paid
-    summary.total_fees_pending = total_balance
-    summary.total_fees_unpaid = total_due - total_paid
-    summary.save()
-
-
-
 # ===========================
 # 📊 JSON Summary Endpoint
 # ===========================
 @login_required
+@conditional_on_versions(FINANCE_VERSION_SCOPE)
 def finance_summary_json(request):
-    total_students = Student.objects.count()  # all students
-    students_with_fees = Invoice.objects.values('student').distinct().count()  # students with invoices
-
-    total_invoices = Invoice.objects.count()
-    total_paid = Invoice.objects.aggregate(total=Sum('total_paid'))['total'] or 0
-    total_due = Invoice.objects.aggregate(total=Sum('total_due'))['total'] or 0
-    total_balance = total_due - total_paid
-    pending_total = Invoice.objects.filter(balance__gt=0, total_paid__gt=0).aggregate(total=Sum('balance'))['total'] or 0
-
-    data = {
-        "total_students": total_students,
-        "students_with_fees": students_with_fees,
-        "total_invoices": total_invoices,
-        "total_paid": float(total_paid),
-        "total_due": float(total_due),
-        "total_balance": float(total_balance),
-        "pending_total": float(pending_total),
-    }
-    return JsonResponse(data)
+    return JsonResponse(finance_summary_data())
 
 
 
 @login_required
+@conditional_on_versions(FINANCE_VERSION_SCOPE)
 def invoices_json(request):
     """
-    Return invoices + summary as JSON for live updates.
-    Converts Decimal fields to floats so JsonResponse won't choke.
+    Invoice change feed for live updates.
+
+    Without ?since= this returns the first page of all invoices; pass back the
+    returned cursor as ?since= to get the next page, and keep polling with it to
+    receive only changed invoices and deleted ids. Totals come from FinanceSummary.
     """
-    qs = Invoice.objects.select_related("student", "session").order_by("-date_issued")
-
-    invoices_list = []
-    for inv in qs:
-        # Student display: use get_full_name if available, fallback to string
-        student_name = inv.student.get_full_name() if hasattr(inv.student, "get_full_name") else str(inv.student)
-        session_label = str(inv.session) if inv.session else ""
-
-        invoices_list.append({
-            "id": inv.id,
-            "invoice_number": inv.invoice_number,
-            "student_name": student_name,
-            "session": session_label,
-            "term": inv.term,
-            "total_due": float(inv.total_due),
-            "total_paid": float(inv.total_paid),
-            "balance": float(inv.balance),
-            "is_paid": bool(inv.is_paid),
-            "date_issued": inv.date_issued.isoformat() if inv.date_issued else None,
-        })
-
-    # Totals (safe cast to float)
-    total_due = float(Invoice.objects.aggregate(total=Sum("total_due"))["total"] or 0)
-    total_paid = float(Invoice.objects.aggregate(total=Sum("total_paid"))["total"] or 0)
-    total_balance = float(Invoice.objects.aggregate(total=Sum("balance"))["total"] or 0)
-
-    return JsonResponse({
-        "invoices": invoices_list,
-        "summary": {
-            "total_due": total_due,
-            "total_paid": total_paid,
-            "total_balance": total_balance,
-        }
-    })
+    return JsonResponse(invoice_changes(
+        since=request.GET.get("since"),
+        page_size=invoice_feed_page_size(request.GET.get("page_size")),
+    ))
 
 #==========================
 # 📄 Download Invoice as PDF
@@ -284,62 +215,27 @@ def is_finance_user(user):
 @user_passes_test(is_finance_user)
 def financial_report(request):
     # --- Filters ---
-    session_id = request.GET.get("session")
-    term = request.GET.get("term")
-    status_filter = request.GET.get("status")
-    search_query = request.GET.get("search")  # ✅ added search input
-
-    # --- Base Query ---
-    report_data = (
-        StudentFeeRecord.objects.values(
-            "student__user__first_name",
-            "student__user__last_name",
-            "session__name",
-            "term",
-        )
-        .annotate(
-            total_due=Sum("total_amount"),
-            total_paid=Sum("amount_paid"),
-            balance=Sum(F("total_amount") - F("amount_paid")),
-        )
-        .order_by("student__user__first_name")
-    )
-    # --- Add computed fields ---
-    for record in report_data:
-        # Assuming the Student model has a field like 'student_id' (e.g., registration number)
-        student_obj = Student.objects.filter(
-            user__first_name=record["student__user__first_name"],
-            user__last_name=record["student__user__last_name"]
-        ).first()
-        record["student_id"] = student_obj.student_id if student_obj else "N/A"
-
-        if record["balance"] < 0:
-            record["status"] = "Overpaid"
-        elif record["balance"] == 0:
-            record["status"] = "Cleared"
-        else:
-            record["status"] = "Owing"
-
-    # --- Apply Filters ---
-    if session_id:
-        session_name = Session.objects.get(id=session_id).name
-        report_data = [r for r in report_data if str(r["session__name"]) == session_name]
-    if term:
-        report_data = [r for r in report_data if r["term"] == term]
-    if status_filter:
-        report_data = [r for r in report_data if r["status"].lower() == status_filter.lower()]
-    if search_query:  # ✅ search by student ID instead of name
-        report_data = [
-            r for r in report_data
-            if search_query.lower() in str(r["student_id"]).lower()
-        ]
+    filters = report_filters(request)
+    cursor = request.GET.get("after")
+
+    report_data, next_cursor = financial_report_page(filters, cursor)
 
+    next_page_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params["after"] = next_cursor
+        next_page_query = params.urlencode()
+
+    first_page_params = request.GET.copy()
+    first_page_params.pop("after", None)
 
     # --- Render HTML Page ---
     sessions = Session.objects.all()
     context = {
         "report_data": report_data,
         "sessions": sessions,
+        "next_page_query": next_page_query,
+        "first_page_query": first_page_params.urlencode() if cursor else None,
     }
     return render(request, "finance/financial_report.html", context)
 
@@ -351,58 +247,47 @@ def financial_report(request):
 @login_required
 @user_passes_test(is_finance_user)
 def export_financial_report_excel(request):
-    # Fetch the same data logic
-    session_id = request.GET.get("session")
-    term = request.GET.get("term")
-    status_filter = request.GET.get("status")
-
-    report_data = (
-        StudentFeeRecord.objects.values(
-            "student__user__first_name",
-            "student__user__last_name",
-            "session__name",
-            "term",
-        )
-        .annotate(
-            total_due=Sum("total_amount"),
-            total_paid=Sum("amount_paid"),
-            balance=Sum(F("total_amount") - F("amount_paid")),
-        )
-        .order_by("student__user__first_name")
-    )
+    """
+    Stream the report as CSV (?format=csv) or XLSX.
 
-    # Add computed fields
-    for record in report_data:
-        record["student_name"] = f"{record['student__user__first_name']} {record['student__user__last_name']}"
-        if record["balance"] < 0:
-            record["status"] = "Overpaid"
-        elif record["balance"] == 0:
-            record["status"] = "Cleared"
-        else:
-            record["status"] = "Owing"
-
-    # Apply Filters
-    if session_id:
-        session_name = Session.objects.get(id=session_id).name
-        report_data = [r for r in report_data if str(r["session__name"]) == session_name]
-    if term:
-        report_data = [r for r in report_data if r["term"] == term]
-    if status_filter:
-        report_data = [r for r in report_data if r["status"].lower() == status_filter.lower()]
-
-    # Export to Excel
-    df = pd.DataFrame(report_data)
-    df = df[["student_name", "session__name", "term", "total_due", "total_paid", "balance", "status"]]
-    output = BytesIO()
-    df.to_excel(output, index=False, sheet_name="Financial Report")
+    Rows come from a DB cursor in chunks; CSV goes straight to the socket and
+    XLSX is built with openpyxl's write-only mode into a temp file, so memory
+    stays flat however many rows the school has.
+    """
+    filters = report_filters(request)
+    rows = iter_financial_report_rows(filters)
+
+    if request.GET.get("format") == "csv":
+        writer = csv.writer(_Echo())
+        lines = itertools.chain([writer.writerow(REPORT_EXPORT_HEADERS)],
+                                (writer.writerow(export_row(record)) for record in rows))
+        response = StreamingHttpResponse(lines, content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="financial_report.csv"'
+        return response
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Financial Report")
+    sheet.append(REPORT_EXPORT_HEADERS)
+    for record in rows:
+        sheet.append(export_row(record))
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
     output.seek(0)
 
-    response = HttpResponse(
+    return FileResponse(
         output,
+        as_attachment=True,
+        filename="financial_report.xlsx",
         content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
-    response["Content-Disposition"] = 'attachment; filename="financial_report.xlsx"'
-    return response
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back to the caller."""
+
+    def write(self, value):
+        return value
 
 
 # =============================
@@ -411,87 +296,13 @@ def export_financial_report_excel(request):
 @login_required
 @user_passes_test(is_finance_user)
 def export_financial_report_pdf(request):
-    session_id = request.GET.get("session")
-    term = request.GET.get("term")
-    status_filter = request.GET.get("status")
-
-    report_data = (
-        StudentFeeRecord.objects.values(
-            "student__user__first_name",
-            "student__user__last_name",
-            "session__name",
-            "term",
-        )
-        .annotate(
-            total_due=Sum("total_amount"),
-            total_paid=Sum("amount_paid"),
-            balance=Sum(F("total_amount") - F("amount_paid")),
-        )
-        .order_by("student__user__first_name")
-    )
-
-    for record in report_data:
-        record["student_name"] = f"{record['student__user__first_name']} {record['student__user__last_name']}"
-        if record["balance"] < 0:
-            record["status"] = "Overpaid"
-        elif record["balance"] == 0:
-            record["status"] = "Cleared"
-        else:
-            record["status"] = "Owing"
-
-    if session_id:
-        session_name = Session.objects.get(id=session_id).name
-        report_data = [r for r in report_data if str(r["session__name"]) == session_name]
-    if term:
-        report_data = [r for r in report_data if r["term"] == term]
-    if status_filter:
-        report_data = [r for r in report_data if r["status"].lower() == status_filter.lower()]
+    filters = report_filters(request)
+    if request.GET.get("background"):
+        return enqueue_report_response(request, "financial_report_pdf", filters)
 
     response = HttpResponse(content_type="application/pdf")
     response["Content-Disposition"] = 'attachment; filename="financial_report.pdf"'
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=landscape(A4))
-    width, height = landscape(A4)
-
-    # Title
-    p.setFont("Helvetica-Bold", 16)
-    p.drawCentredString(width / 2, height - 40, "Student Financial Report")
-
-    # Table header
-    y = height - 80
-    p.setFont("Helvetica-Bold", 10)
-    headers = ["Student Name", "Session", "Term", "Total Due", "Total Paid", "Balance", "Status"]
-    x_positions = [40, 180, 300, 400, 480, 560, 640]
-
-    for i, header in enumerate(headers):
-        p.drawString(x_positions[i], y, header)
-
-    # Table rows
-    y -= 20
-    p.setFont("Helvetica", 9)
-    for record in report_data:
-        if y < 50:
-            p.showPage()
-            p.setFont("Helvetica-Bold", 10)
-            y = height - 50
-            for i, header in enumerate(headers):
-                p.drawString(x_positions[i], y, header)
-            y -= 20
-            p.setFont("Helvetica", 9)
-
-        p.drawString(x_positions[0], y, record["student_name"])
-        p.drawString(x_positions[1], y, record["session__name"])
-        p.drawString(x_positions[2], y, record["term"])
-        p.drawRightString(x_positions[3] + 40, y, f"{record['total_due']:.2f}")
-        p.drawRightString(x_positions[4] + 40, y, f"{record['total_paid']:.2f}")
-        p.drawRightString(x_positions[5] + 40, y, f"{record['balance']:.2f}")
-        p.drawString(x_positions[6], y, record["status"])
-        y -= 18
-
-    p.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    response.write(pdf)
+    response.write(financial_report_pdf(financial_report_rows(filters)))
     return response
 
 
@@ -590,133 +401,10 @@ def export_payment_history_excel(request):
 
 @login_required
 def export_payment_history_pdf(request):
-    parent = Parent.objects.filter(user=request.user).first()
-    payments = Payment.objects.filter(
-        student_fee__student__in=parent.children.all()
-    ).select_related('student_fee__student', 'received_by')
-
-    # ---- Calculate totals ----
-    from django.db.models import Sum
-    child_totals = (
-        payments.values("student_fee__student__user__first_name", "student_fee__student__user__last_name")
-        .annotate(total=Sum("amount"))
-        .order_by("student_fee__student__user__first_name")
-    )
-    total_amount_paid = payments.aggregate(Sum("amount"))["amount__sum"] or 0
-
-    # ---- Prepare PDF ----
-    buffer = io.BytesIO()
-    pdf = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=40,
-        leftMargin=40,
-        topMargin=60,
-        bottomMargin=40,
-    )
-
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # ---- Header ----
-    title_style = ParagraphStyle(
-        "Title",
-        parent=styles["Heading1"],
-        alignment=1,
-        fontSize=16,
-        textColor=colors.HexColor("#1e3a8a"),
-        spaceAfter=20,
-    )
-    subtitle_style = ParagraphStyle(
-        "Subtitle",
-        parent=styles["Normal"],
-        alignment=1,
-        fontSize=10,
-        textColor=colors.grey,
-        spaceAfter=15,
-    )
-
-    elements.append(Paragraph("💰 Payment History Report", title_style))
-    elements.append(Paragraph(
-        f"Parent: <b>{request.user.get_full_name()}</b> &nbsp;&nbsp; | &nbsp;&nbsp; Generated on: {timezone.now().strftime('%b %d, %Y, %I:%M %p')}",
-        subtitle_style,
-    ))
-    elements.append(Spacer(1, 12))
+    if request.GET.get("background"):
+        return enqueue_report_response(request, "payment_history_pdf", {"user_id": request.user.pk})
 
-    # ---- Payment Table ----
-    table_data = [["#", "Child", "Amount (₵)", "Method", "Reference", "Date", "Received By"]]
-    for i, p in enumerate(payments, 1):
-        table_data.append([
-            str(i),
-            p.student_fee.student.user.get_full_name(),
-            f"{p.amount:.2f}",
-            p.get_payment_method_display(),
-            p.reference or "-",
-            timezone.localtime(p.date_paid).strftime("%b %d, %Y"),
-            p.received_by.get_username() if p.received_by else "N/A",
-        ])
-
-    table = Table(table_data, repeatRows=1, hAlign="LEFT", colWidths=[30, 100, 70, 70, 80, 80, 80])
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e3a8a")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 10),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 20))
-
-    # ---- Summary by Child ----
-    if child_totals:
-        elements.append(Paragraph("🧾 Summary by Child", ParagraphStyle(
-            "Header2", parent=styles["Heading2"], textColor=colors.HexColor("#1e3a8a"), spaceAfter=10,
-        )))
-        child_table_data = [["Child", "Total Paid (₵)"]]
-        for c in child_totals:
-            full_name = f"{c['student_fee__student__user__first_name']} {c['student_fee__student__user__last_name']}"
-            child_table_data.append([full_name, f"{c['total']:.2f}"])
-
-        child_table = Table(child_table_data, repeatRows=1, colWidths=[200, 120])
-        child_table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e3a8a")),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-            ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-        elements.append(child_table)
-        elements.append(Spacer(1, 20))
-
-    # ---- Overall Summary ----
-    elements.append(Paragraph("💰 Overall Summary", ParagraphStyle(
-        "Header2", parent=styles["Heading2"], textColor=colors.HexColor("#1e3a8a"), spaceAfter=10,
-    )))
-
-    summary_data = [
-        ["Total Payments Made", str(payments.count())],
-        ["Total Amount Paid", f"₵{total_amount_paid:.2f}"],
-    ]
-    summary_table = Table(summary_data, colWidths=[200, 150])
-    summary_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eef2ff")),
-        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-    ]))
-    elements.append(summary_table)
-
-    # ---- Build PDF ----
-    pdf.build(elements)
-    buffer.seek(0)
-
-    response = HttpResponse(buffer, content_type="application/pdf")
+    response = HttpResponse(payment_history_pdf(request.user), content_type="application/pdf")
     response["Content-Disposition"] = f'attachment; filename="Payment_History_{timezone.now().strftime("%Y%m%d")}.pdf"'
     return response
 
@@ -754,8 +442,12 @@ def bulk_fee_assignment(request):
     if request.method == "POST":
         form = BulkFeeForm(request.POST)
         if form.is_valid():
-            form.save()
-            messages.success(request, "📦 Bulk Fee Assigned Successfully.")
+            assignment = form.save()
+            messages.success(
+                request,
+                f"📦 Bulk Fee Assigned Successfully: {assignment.records_created} records created, "
+                f"{assignment.records_skipped} skipped (already exist).",
+            )
             return redirect("manage_fees")
     else:
         form = BulkFeeForm()
@@ -808,26 +500,9 @@ def bulk_create_fee_records(request):
             fee_type = form.cleaned_data["fee_type"]
             total_amount = form.cleaned_data["total_amount"]
 
-            students = Student.objects.all()
-            created_count = 0
-            skipped_count = 0
-
-            for student in students:
-                obj, created = StudentFeeRecord.objects.get_or_create(
-                    student=student,
-                    session=session,
-                    term=term,
-                    fee_type=fee_type,
-                    defaults={
-                        "total_amount": total_amount,
-                        "amount_paid": 0,
-                        "balance": total_amount,
-                    },
-                )
-                if created:
-                    created_count += 1
-                else:
-                    skipped_count += 1
+            created_count, skipped_count = assign_fee_to_students(
+                Student.objects.all(), fee_type, session, term, total_amount
+            )
 
             messages.success(request, f"✅ {created_count} records created, {skipped_count} skipped (already exist).")
             return redirect("manage_fees")
@@ -12,6 +12,7 @@ pip install -r requirements.txt
 # ----------------------------
 python manage.py makemigrations --noinput
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 # ----------------------------
 # COLLECT STATIC FILES
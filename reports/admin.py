@@ -1,3 +1,11 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import ReportJob
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("kind", "requested_by", "status", "created_at", "finished_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("dedupe_key", "progress", "started_at", "finished_at", "error")
@@ -0,0 +1,188 @@
+"""
+Report job registry and execution.
+
+Each kind maps to a renderer taking the job's params, a
+progress(done, total) callback and the number of render processes it may
+use, and returning (filename, file_bytes). Views enqueue with
+`enqueue_report`; the `run_report_worker` command drains the queue with
+`run_pending_jobs` and deletes expired jobs with `prune_finished_jobs`.
+"""
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from accounts.models import CustomUser, Student
+from finance.pdf import financial_report_pdf, payment_history_pdf
+from finance.reports import financial_report_rows
+from academics.models import ClassRoom
+from results.pdf import cached_result_pdf, class_report_cards, result_pdf_filename
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+# A job still RUNNING this long after it was claimed lost its worker (crash,
+# deploy, OOM kill); it is failed so the requester can queue it again.
+RUNNING_JOB_TIMEOUT = timedelta(minutes=30)
+
+# Finished jobs and their files are deleted this long after they finish;
+# static/js/report_jobs.js starts the download as soon as a job is done.
+FINISHED_JOB_RETENTION = timedelta(days=1)
+
+ENQUEUE_ATTEMPTS = 3
+
+
+def _render_financial_report(params, progress, workers):
+    return "financial_report.pdf", financial_report_pdf(financial_report_rows(params))
+
+
+def _render_payment_history(params, progress, workers):
+    user = CustomUser.objects.get(pk=params["user_id"])
+    return f"Payment_History_{timezone.now().strftime('%Y%m%d')}.pdf", payment_history_pdf(user)
+
+
+def _render_result(params, progress, workers):
+    student = Student.objects.select_related("user").get(pk=params["student_id"])
+    session_id = params.get("session_id")
+    return result_pdf_filename(student, session_id), cached_result_pdf(student, session_id)
+
+
+def _render_class_report_cards(params, progress, workers):
+    classroom = ClassRoom.objects.get(pk=params["classroom_id"])
+    return class_report_cards(
+        classroom, params.get("session_id"), archive=params.get("archive", "pdf"),
+        progress=progress, workers=workers,
+    )
+
+
+REPORT_RENDERERS = {
+    "financial_report_pdf": _render_financial_report,
+    "payment_history_pdf": _render_payment_history,
+    "result_pdf": _render_result,
+    "class_report_cards": _render_class_report_cards,
+}
+
+
+def _dedupe_key(kind, params, user):
+    payload = json.dumps([kind, params, user.pk], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def enqueue_report(kind, params, user):
+    """Queue a render, or return the identical job that is already in flight."""
+    if kind not in REPORT_RENDERERS:
+        raise ValueError(f"Unknown report kind: {kind}")
+
+    dedupe_key = _dedupe_key(kind, params, user)
+    in_flight = ReportJob.objects.filter(dedupe_key=dedupe_key, status__in=ReportJob.IN_FLIGHT)
+
+    for _ in range(ENQUEUE_ATTEMPTS):
+        job = in_flight.first()
+        if job:
+            return job
+        try:
+            with transaction.atomic():
+                return ReportJob.objects.create(kind=kind, params=params, dedupe_key=dedupe_key, requested_by=user)
+        except IntegrityError:
+            # Lost the race to a concurrent identical request. Share its job,
+            # or queue again if it finished in the meantime.
+            continue
+    # Still racing: the newest identical job (whatever its state) answers.
+    return ReportJob.objects.filter(dedupe_key=dedupe_key).latest("created_at")
+
+
+def fail_abandoned_jobs():
+    """Fail RUNNING jobs claimed more than RUNNING_JOB_TIMEOUT ago; returns how many."""
+    now = timezone.now()
+    abandoned = ReportJob.objects.filter(
+        status=ReportJob.Status.RUNNING, started_at__lt=now - RUNNING_JOB_TIMEOUT
+    ).update(
+        status=ReportJob.Status.FAILED,
+        error="The report worker stopped before this report finished. Please request it again.",
+        finished_at=now,
+    )
+    if abandoned:
+        logger.warning("Failed %s abandoned report job(s)", abandoned)
+    return abandoned
+
+
+def prune_finished_jobs():
+    """
+    Delete DONE/FAILED jobs that finished more than FINISHED_JOB_RETENTION
+    ago, with their artifact files; returns how many.
+    """
+    expired = ReportJob.objects.filter(
+        status__in=(ReportJob.Status.DONE, ReportJob.Status.FAILED),
+        finished_at__lt=timezone.now() - FINISHED_JOB_RETENTION,
+    )
+    pruned = 0
+    for job in expired.iterator():
+        if job.artifact:
+            job.artifact.delete(save=False)
+        job.delete()
+        pruned += 1
+    if pruned:
+        logger.info("Pruned %s finished report job(s)", pruned)
+    return pruned
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest pending job to running; None if the queue is
+    empty. Jobs abandoned by a dead worker are failed first.
+    """
+    fail_abandoned_jobs()
+    for job in ReportJob.objects.filter(status=ReportJob.Status.PENDING).order_by("created_at")[:10]:
+        claimed = ReportJob.objects.filter(pk=job.pk, status=ReportJob.Status.PENDING).update(
+            status=ReportJob.Status.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def _progress_reporter(job):
+    """progress(done, total) callback that stores whole percents on the job row."""
+    def progress(done, total):
+        percent = int(done * 100 / total) if total else 100
+        if percent != job.progress:
+            job.progress = percent
+            ReportJob.objects.filter(pk=job.pk).update(progress=percent)
+    return progress
+
+
+def run_job(job, render_workers=1):
+    try:
+        filename, content = REPORT_RENDERERS[job.kind](job.params, _progress_reporter(job), render_workers)
+    except Exception as e:
+        logger.exception("Report job %s failed", job.pk)
+        job.status = ReportJob.Status.FAILED
+        job.error = str(e)
+    else:
+        job.artifact.save(filename, ContentFile(content), save=False)
+        job.status = ReportJob.Status.DONE
+        job.progress = 100
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def run_pending_jobs(limit=None, render_workers=1):
+    """
+    Run queued jobs until the queue is empty (or `limit` is reached).
+    `render_workers` > 1 lets batch renders use a process pool, which only
+    a management command's process can start safely.
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job, render_workers)
+        processed += 1
+    return processed
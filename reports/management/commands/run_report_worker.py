@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.jobs import prune_finished_jobs, run_pending_jobs
+from results.pdf import default_report_card_workers
+
+# Seconds between sweeps for expired report files.
+PRUNE_INTERVAL = 600
+
+
+class Command(BaseCommand):
+    help = "Render queued report jobs (PDF exports) outside the web workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument(
+            "--render-workers", type=int,
+            help="Processes for batch report cards (default: REPORT_CARD_WORKERS or CPU count).",
+        )
+
+    def handle(self, *args, **options):
+        render_workers = options["render_workers"] or default_report_card_workers()
+        next_prune = 0
+        while True:
+            if time.monotonic() >= next_prune:
+                prune_finished_jobs()
+                next_prune = time.monotonic() + PRUNE_INTERVAL
+            processed = run_pending_jobs(render_workers=render_workers)
+            if processed:
+                self.stdout.write(f"Processed {processed} report job(s).")
+            if options["once"]:
+                break
+            if not processed:
+                time.sleep(options["interval"])
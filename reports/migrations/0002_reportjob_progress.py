@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
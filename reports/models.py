@@ -1,3 +1,50 @@
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+from accounts.models import CustomUser
+
+
+# ===========================
+# 🔹 Background Report Job
+# ===========================
+class ReportJob(models.Model):
+    """
+    A queued report render. The web request only inserts a row; the
+    `run_report_worker` command renders it and stores the file under
+    MEDIA_ROOT/reports/.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    IN_FLIGHT = (Status.PENDING, Status.RUNNING)
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    # Hash of kind + params + requester; identical in-flight requests share a job.
+    dedupe_key = models.CharField(max_length=64, db_index=True)
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="report_jobs")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    artifact = models.FileField(upload_to="reports/%Y/%m/", blank=True)
+    # Percent done, for renderers that report it (batch report cards)
+    progress = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=Q(status__in=["pending", "running"]),
+                name="unique_in_flight_report_job",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
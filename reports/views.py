@@ -1,3 +1,54 @@
-from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 
-# Create your views here.
+from .jobs import enqueue_report
+from .models import ReportJob
+
+
+def _job_payload(job):
+    data = {
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "status_url": reverse("report_job_status", args=[job.pk]),
+        "download_url": None,
+        "error": job.error or None,
+    }
+    if job.status == ReportJob.Status.DONE and job.artifact:
+        data["download_url"] = reverse("report_job_download", args=[job.pk])
+    return data
+
+
+def enqueue_report_response(request, kind, params):
+    """Queue a report from a download view and answer 202 with the poll URL."""
+    job = enqueue_report(kind, params, request.user)
+    return JsonResponse(_job_payload(job), status=202)
+
+
+def _get_own_job(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+    if job.requested_by_id != request.user.pk and not request.user.is_superuser:
+        raise Http404
+    return job
+
+
+# ===========================
+# 🔄 Poll Job Status
+# ===========================
+@login_required
+def report_job_status(request, pk):
+    return JsonResponse(_job_payload(_get_own_job(request, pk)))
+
+
+# ===========================
+# 📥 Download Finished Report
+# ===========================
+@login_required
+def report_job_download(request, pk):
+    job = _get_own_job(request, pk)
+    if job.status != ReportJob.Status.DONE or not job.artifact:
+        raise Http404("Report is not ready yet.")
+    return FileResponse(job.artifact.open("rb"), as_attachment=True, filename=job.artifact.name.rsplit("/", 1)[-1])
@@ -0,0 +1,83 @@
+from bisect import bisect_right
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+
+# =========================================
+# 🔹 Grading scale
+# =========================================
+# Shared by ResultRecord.save() and the bulk paths (bulk_update skips save()).
+# Boundaries can be overridden with settings.RESULT_GRADING_SCALE using the same
+# (minimum total, grade, remark) shape; run `manage.py regrade_session` after
+# changing them.
+DEFAULT_GRADING_SCALE = (
+    (80, "A", "Excellent"),
+    (75, "B+", "Very Good"),
+    (70, "B", "Good"),
+    (65, "C+", "Credit"),
+    (60, "C", "Average"),
+    (50, "D", "Pass"),
+    (0, "F", "Fail"),
+)
+
+
+class GradingScale:
+    """Boundary table: a total gets the band with the highest minimum it reaches."""
+
+    def __init__(self, boundaries):
+        bands = sorted(boundaries, key=lambda band: band[0])
+        if not bands:
+            raise ValueError("A grading scale needs at least one band.")
+        self.minimums = [band[0] for band in bands]
+        self.grades = [band[1] for band in bands]
+        self.remarks = [band[2] for band in bands]
+        self._minimum_array = np.array(self.minimums, dtype=float)
+        self._grade_array = np.array(self.grades, dtype=object)
+        self._remark_array = np.array(self.remarks, dtype=object)
+
+    def grade(self, total_score):
+        """(grade, remark) for one total; totals below the lowest band get the lowest band."""
+        band = max(bisect_right(self.minimums, total_score) - 1, 0)
+        return self.grades[band], self.remarks[band]
+
+    def grade_many(self, total_scores):
+        """(grades, remarks) lists for a batch of totals in one vectorised lookup."""
+        totals = np.asarray([float(total) for total in total_scores], dtype=float)
+        if not totals.size:
+            return [], []
+        bands = np.clip(np.searchsorted(self._minimum_array, totals, side="right") - 1, 0, None)
+        return self._grade_array[bands].tolist(), self._remark_array[bands].tolist()
+
+
+@lru_cache(maxsize=4)
+def _scale(boundaries):
+    return GradingScale(boundaries)
+
+
+def get_grading_scale():
+    boundaries = getattr(settings, "RESULT_GRADING_SCALE", DEFAULT_GRADING_SCALE)
+    return _scale(tuple(tuple(band) for band in boundaries))
+
+
+def grade_for(total_score):
+    """Return (grade, remark) for a total score out of 100."""
+    return get_grading_scale().grade(total_score)
+
+
+def apply_grade(record):
+    """Set total_score, grade and remark on a ResultRecord in memory."""
+    record.total_score = record.test_score + record.exam_score
+    record.grade, record.remark = grade_for(record.total_score)
+    return record
+
+
+def apply_grades(records):
+    """apply_grade() for a whole batch, grading every total in one pass."""
+    records = list(records)
+    for record in records:
+        record.total_score = record.test_score + record.exam_score
+    grades, remarks = get_grading_scale().grade_many(record.total_score for record in records)
+    for record, grade, remark in zip(records, grades, remarks):
+        record.grade, record.remark = grade, remark
+    return records
@@ -0,0 +1,160 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from academics.models import Enrollment
+from accounts.metrics import bump_student_versions, bump_teacher_versions
+from accounts.models import Student
+from .grading import apply_grades
+from .models import ResultRecord
+from .ranking import queue_class_ranking, ranking_key
+from .stats import bump_class_stats
+
+# =========================================
+# 🔹 Bulk result grid (mark_results)
+# =========================================
+# One subject/session/term sheet for a whole class: a fixed number of queries
+# to load it and one bulk_update to save it, however many students there are.
+RESULT_GRID_BATCH = 500
+
+TEST_MAX = Decimal("40")
+EXAM_MAX = Decimal("60")
+GRADED_FIELDS = ["test_score", "exam_score", "total_score", "grade", "remark", "teacher"]
+
+
+def load_result_grid(subject, session, term, teacher):
+    """
+    Return [(student, record)] for the subject's class, ordered like the class list.
+
+    Missing enrollments and result records are bulk-created (zero scores);
+    existing records, from earlier sessions' marking included, are left alone.
+    """
+    classroom = subject.classroom
+    students = list(
+        Student.objects.filter(current_class=classroom, is_active=True).select_related("user")
+    )
+    student_ids = [student.id for student in students]
+
+    enrolled = set(
+        Enrollment.objects.filter(subject=subject, student_id__in=student_ids).values_list("student_id", flat=True)
+    )
+    Enrollment.objects.bulk_create(
+        [Enrollment(student_id=student_id, subject=subject) for student_id in student_ids if student_id not in enrolled],
+        batch_size=RESULT_GRID_BATCH,
+        ignore_conflicts=True,
+    )
+
+    sheet = ResultRecord.objects.filter(subject=subject, session=session, term=term, student_id__in=student_ids)
+    records = {record.student_id: record for record in sheet}
+    # bulk_create skips save(), so grade the blank records here.
+    missing = apply_grades(
+        ResultRecord(
+            student_id=student_id,
+            subject=subject,
+            classroom=classroom,
+            session=session,
+            term=term,
+            teacher=teacher,
+            test_score=Decimal("0"),
+            exam_score=Decimal("0"),
+        )
+        for student_id in student_ids
+        if student_id not in records
+    )
+    if missing:
+        ResultRecord.objects.bulk_create(missing, batch_size=RESULT_GRID_BATCH, ignore_conflicts=True)
+        # ignore_conflicts leaves pks unset; read the sheet back once.
+        records = {record.student_id: record for record in sheet.all()}
+        bump_student_versions(record.student_id for record in missing)
+        bump_teacher_versions([teacher.pk])
+        queue_class_ranking([ranking_key(missing[0])])
+        bump_class_stats([ranking_key(missing[0])])
+
+    return [(student, records[student.id]) for student in students if student.id in records]
+
+
+def parse_score(value, maximum, label):
+    """Decimal score from a form/CSV value; blank means 0."""
+    try:
+        score = Decimal(str(value).strip() or "0")
+    except InvalidOperation:
+        raise ValueError(f"{label} '{value}' is not a number.")
+    if not score.is_finite() or score < 0 or score > maximum:
+        raise ValueError(f"{label} must be between 0 and {maximum}.")
+    return score
+
+
+def save_result_grid(grid, scores, teacher):
+    """
+    Apply {student_id: (test, exam)} to the grid's records and save them with
+    one bulk_update. Returns the number of records changed.
+
+    bulk_update skips save() and signals, so grading and dashboard
+    invalidation happen here.
+    """
+    changed = []
+    for student, record in grid:
+        if student.id not in scores:
+            continue
+        test_score, exam_score = scores[student.id]
+        if (record.test_score, record.exam_score, record.teacher_id) == (test_score, exam_score, teacher.pk):
+            continue
+        previous_teacher_id = record.teacher_id
+        record.test_score, record.exam_score, record.teacher = test_score, exam_score, teacher
+        changed.append((record, previous_teacher_id))
+
+    if changed:
+        apply_grades(record for record, _ in changed)
+        with transaction.atomic():
+            ResultRecord.objects.bulk_update([record for record, _ in changed], GRADED_FIELDS, batch_size=RESULT_GRID_BATCH)
+        bump_student_versions(record.student_id for record, _ in changed)
+        bump_teacher_versions([teacher.pk, *(previous for _, previous in changed)])
+        classes = {ranking_key(record) for record, _ in changed}
+        queue_class_ranking(classes)
+        bump_class_stats(classes)
+    return len(changed)
+
+
+# =========================================
+# 🔹 Bulk regrade (after grading scale changes)
+# =========================================
+def regrade_results(queryset, batch_size=RESULT_GRID_BATCH):
+    """
+    Recompute total/grade/remark for every record in the queryset, batch by
+    batch, and bulk_update only the rows whose grade actually changed.
+    Returns (checked, changed) counts.
+    """
+    checked = changed = 0
+    batch = []
+    records = queryset.order_by().only(
+        "id", "student_id", "teacher_id", "classroom_id", "session_id", "term",
+        "test_score", "exam_score", "total_score", "grade", "remark",
+    ).iterator(chunk_size=batch_size)
+
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            changed += _regrade_batch(batch)
+            checked += len(batch)
+            batch = []
+    if batch:
+        changed += _regrade_batch(batch)
+        checked += len(batch)
+    return checked, changed
+
+
+def _regrade_batch(records):
+    before = [(record.total_score, record.grade, record.remark) for record in records]
+    apply_grades(records)
+    stale = [
+        record for record, previous in zip(records, before)
+        if (record.total_score, record.grade, record.remark) != previous
+    ]
+    if stale:
+        ResultRecord.objects.bulk_update(stale, ["total_score", "grade", "remark"], batch_size=RESULT_GRID_BATCH)
+        bump_student_versions(record.student_id for record in stale)
+        bump_teacher_versions(record.teacher_id for record in stale)
+        classes = {ranking_key(record) for record in stale}
+        queue_class_ranking(classes)
+        bump_class_stats(classes)
+    return len(stale)
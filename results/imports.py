@@ -0,0 +1,235 @@
+import csv
+import io
+import itertools
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db import transaction
+from openpyxl import load_workbook
+
+from academics.models import Enrollment
+from accounts.metrics import bump_student_versions, bump_teacher_versions
+from accounts.models import Student
+from .grading import apply_grades
+from .grid import EXAM_MAX, GRADED_FIELDS, RESULT_GRID_BATCH, TEST_MAX, parse_score
+from .models import ResultRecord
+from .ranking import queue_class_ranking, ranking_key
+from .stats import bump_class_stats
+
+# =========================================
+# 🔹 Bulk results import (CSV / XLSX)
+# =========================================
+# Rows are read in chunks; each chunk costs one student lookup, one
+# result lookup, one bulk_create and one bulk_update, however many rows it
+# holds. Bad rows are collected for the error report instead of aborting the
+# whole sheet.
+IMPORT_CHUNK_SIZE = RESULT_GRID_BATCH
+IMPORT_COLUMNS = ("student_id", "test_score", "exam_score")
+IMPORT_ERROR_HEADERS = ["row", "student_id", "test_score", "exam_score", "error"]
+IMPORT_ERROR_TIMEOUT = 60 * 60
+IMPORT_ERROR_KEY = "results:import-errors:{}"
+
+
+@dataclass
+class ResultImport:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: list = field(default_factory=list)  # [row number, student_id, test, exam, message]
+
+    @property
+    def imported(self):
+        return self.created + self.updated + self.unchanged
+
+    def reject(self, row_number, row, message):
+        self.errors.append([
+            row_number, row.get("student_id", ""), row.get("test_score", ""), row.get("exam_score", ""), message,
+        ])
+
+
+# =========================================
+# 🔹 Readers
+# =========================================
+def _normalise_header(header):
+    return [str(cell or "").strip().lower() for cell in header]
+
+
+def _check_header(header):
+    missing = [column for column in IMPORT_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}.")
+
+
+def _iter_csv_rows(uploaded_file):
+    text = io.TextIOWrapper(uploaded_file.file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = _normalise_header(next(reader, []))
+        _check_header(header)
+        for row_number, values in enumerate(reader, start=2):
+            if any(value.strip() for value in values):
+                yield row_number, dict(zip(header, values))
+    except UnicodeDecodeError:
+        raise ValueError("CSV files must be saved as UTF-8.")
+    finally:
+        text.detach()
+
+
+def _iter_xlsx_rows(uploaded_file):
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalise_header(next(rows, ()))
+        _check_header(header)
+        for row_number, values in enumerate(rows, start=2):
+            if any(value not in (None, "") for value in values):
+                yield row_number, {key: "" if value is None else value for key, value in zip(header, values)}
+    finally:
+        workbook.close()
+
+
+def iter_result_rows(uploaded_file):
+    """
+    Yield (row number, {column: value}) from an uploaded CSV or XLSX sheet.
+
+    Both are read lazily; raises ValueError for unsupported files or a header
+    without the template's columns.
+    """
+    name = (uploaded_file.name or "").lower()
+    if name.endswith(".xlsx"):
+        return _iter_xlsx_rows(uploaded_file)
+    if name.endswith(".csv"):
+        return _iter_csv_rows(uploaded_file)
+    raise ValueError("Upload a .csv or .xlsx file.")
+
+
+def _parse_student_id(value):
+    # Spreadsheets hand integer ids back as 12.0
+    try:
+        student_id = Decimal(str(value).strip())
+    except InvalidOperation:
+        student_id = None
+    if student_id is None or not student_id.is_finite() or student_id != student_id.to_integral_value() or student_id < 1:
+        raise ValueError(f"Student ID '{value}' is not valid.")
+    return int(student_id)
+
+
+# =========================================
+# 🔹 Import
+# =========================================
+def import_results(rows, subject, session, term, teacher, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Upsert a subject/session/term sheet from iter_result_rows() output.
+
+    Rows are rejected (not fatal) for bad ids, unknown or inactive students,
+    scores outside the 40/60 limits and repeated students. Everything valid is
+    written in one transaction. Returns a ResultImport.
+    """
+    outcome = ResultImport()
+    seen = set()
+    rows = iter(rows)
+    with transaction.atomic():
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            _import_chunk(chunk, subject, session, term, teacher, outcome, seen)
+    return outcome
+
+
+def _import_chunk(chunk, subject, session, term, teacher, outcome, seen):
+    parsed = []
+    for row_number, row in chunk:
+        try:
+            student_id = _parse_student_id(row.get("student_id", ""))
+            test_score = parse_score(row.get("test_score", ""), TEST_MAX, "Test score")
+            exam_score = parse_score(row.get("exam_score", ""), EXAM_MAX, "Exam score")
+        except ValueError as error:
+            outcome.reject(row_number, row, str(error))
+            continue
+        if student_id in seen:
+            outcome.reject(row_number, row, "Student appears more than once in the file.")
+            continue
+        seen.add(student_id)
+        parsed.append((row_number, row, student_id, test_score, exam_score))
+
+    students = Student.objects.filter(is_active=True).only("id", "current_class_id").in_bulk(
+        [student_id for _, _, student_id, _, _ in parsed]
+    )
+    existing = {
+        record.student_id: record
+        for record in ResultRecord.objects.filter(
+            subject=subject, session=session, term=term, student_id__in=list(students)
+        ).only(
+            "id", "student_id", "teacher_id", "classroom_id", "session_id", "term",
+            "test_score", "exam_score", "total_score", "grade", "remark",
+        )
+    }
+
+    to_create, to_update, previous_teachers = [], [], []
+    for row_number, row, student_id, test_score, exam_score in parsed:
+        student = students.get(student_id)
+        if student is None:
+            outcome.reject(row_number, row, "No active student with this ID.")
+            continue
+        record = existing.get(student_id)
+        if record is None:
+            if not student.current_class_id:
+                outcome.reject(row_number, row, "Student has no current class.")
+                continue
+            to_create.append(ResultRecord(
+                student_id=student_id,
+                subject=subject,
+                classroom_id=student.current_class_id,
+                session=session,
+                term=term,
+                teacher=teacher,
+                test_score=test_score,
+                exam_score=exam_score,
+            ))
+        elif (record.test_score, record.exam_score, record.teacher_id) == (test_score, exam_score, teacher.pk):
+            outcome.unchanged += 1
+        else:
+            previous_teachers.append(record.teacher_id)
+            record.test_score, record.exam_score, record.teacher = test_score, exam_score, teacher
+            to_update.append(record)
+
+    # bulk_create / bulk_update skip save() and signals: grade and bump here.
+    if to_create:
+        ResultRecord.objects.bulk_create(apply_grades(to_create), batch_size=RESULT_GRID_BATCH)
+        Enrollment.objects.bulk_create(
+            [Enrollment(student_id=record.student_id, subject=subject) for record in to_create],
+            batch_size=RESULT_GRID_BATCH,
+            ignore_conflicts=True,
+        )
+    if to_update:
+        ResultRecord.objects.bulk_update(apply_grades(to_update), GRADED_FIELDS, batch_size=RESULT_GRID_BATCH)
+    if to_create or to_update:
+        bump_student_versions(record.student_id for record in itertools.chain(to_create, to_update))
+        bump_teacher_versions([teacher.pk, *previous_teachers])
+        classes = {ranking_key(record) for record in itertools.chain(to_create, to_update)}
+        queue_class_ranking(classes)
+        bump_class_stats(classes)
+
+    outcome.created += len(to_create)
+    outcome.updated += len(to_update)
+
+
+# =========================================
+# 🔹 Error report
+# =========================================
+def store_error_report(errors):
+    """Keep rejected rows as CSV for IMPORT_ERROR_TIMEOUT; returns the download token."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(IMPORT_ERROR_HEADERS)
+    writer.writerows(sorted(errors, key=lambda error: error[0]))
+    token = uuid.uuid4().hex
+    cache.set(IMPORT_ERROR_KEY.format(token), output.getvalue(), IMPORT_ERROR_TIMEOUT)
+    return token
+
+
+def get_error_report(token):
+    return cache.get(IMPORT_ERROR_KEY.format(token))
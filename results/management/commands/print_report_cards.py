@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.models import ClassRoom, Session
+from results.pdf import class_report_cards, default_report_card_workers
+
+
+class Command(BaseCommand):
+    help = "Render every active student's result sheet for a class into one PDF (or a ZIP)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("classroom", help="Class id or name, e.g. JHS 1")
+        parser.add_argument("--session", help="Only this session (id or name, e.g. 2025/2026)")
+        parser.add_argument("--format", choices=["pdf", "zip"], default="pdf")
+        parser.add_argument("--workers", type=int, help="Render processes (default: REPORT_CARD_WORKERS or CPU count)")
+        parser.add_argument("--output", help="File or directory to write (default: current directory)")
+
+    def handle(self, *args, **options):
+        classroom = ClassRoom.objects.filter(name=options["classroom"]).first()
+        if classroom is None and options["classroom"].isdigit():
+            classroom = ClassRoom.objects.filter(pk=int(options["classroom"])).first()
+        if classroom is None:
+            raise CommandError(f"Class '{options['classroom']}' not found.")
+
+        session = None
+        if options["session"]:
+            session = Session.objects.filter(name=options["session"]).first()
+            if session is None and options["session"].isdigit():
+                session = Session.objects.filter(pk=int(options["session"])).first()
+            if session is None:
+                raise CommandError(f"Session '{options['session']}' not found.")
+
+        def progress(done, total):
+            self.stdout.write(f"\rRendered {done}/{total}", ending="")
+            self.stdout.flush()
+
+        try:
+            filename, content = class_report_cards(
+                classroom, session and session.pk, archive=options["format"],
+                progress=progress, workers=options["workers"] or default_report_card_workers(),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write("")
+
+        output = Path(options["output"] or ".")
+        if output.is_dir():
+            output = output / filename
+        output.write_bytes(content)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output} ({len(content) // 1024} KB)."))
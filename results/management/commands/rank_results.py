@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.models import Session
+from results.models import ResultRecord
+from results.ranking import rank_school
+
+
+class Command(BaseCommand):
+    help = "Recompute ResultSummary totals and class positions for the whole school."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--session", help="Only this session (id or name, e.g. 2025/2026)")
+        parser.add_argument("--term", choices=[term for term, _ in ResultRecord.TERM_CHOICES])
+
+    def handle(self, *args, **options):
+        session = None
+        if options["session"]:
+            session = Session.objects.filter(name=options["session"]).first()
+            if session is None and options["session"].isdigit():
+                session = Session.objects.filter(pk=int(options["session"])).first()
+            if session is None:
+                raise CommandError(f"Session '{options['session']}' not found.")
+
+        started = time.monotonic()
+        created, updated, deleted = rank_school(session_id=session and session.pk, term=options["term"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Ranked results in {time.monotonic() - started:.1f}s: "
+            f"{created} summaries created, {updated} updated, {deleted} removed."
+        ))
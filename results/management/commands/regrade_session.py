@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from academics.models import Session
+from results.grid import regrade_results
+from results.models import ResultRecord
+
+
+class Command(BaseCommand):
+    help = "Recompute totals, grades and remarks for a session after the grading scale changes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("session", help="Session id or name, e.g. 2025/2026")
+        parser.add_argument("--term", choices=[term for term, _ in ResultRecord.TERM_CHOICES])
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        session = Session.objects.filter(name=options["session"]).first()
+        if session is None and options["session"].isdigit():
+            session = Session.objects.filter(pk=int(options["session"])).first()
+        if session is None:
+            raise CommandError(f"Session '{options['session']}' not found.")
+
+        records = ResultRecord.objects.filter(session=session)
+        if options["term"]:
+            records = records.filter(term=options["term"])
+
+        with transaction.atomic():
+            checked, changed = regrade_results(records, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Regraded {session}: {checked} results checked, {changed} updated."
+        ))
@@ -5,6 +5,7 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 # 🔹 Import related models
 from accounts.models import Student, CustomUser
 from academics.models import Subject, Session, ClassRoom
+from .grading import apply_grade
 
 
 # =========================================
@@ -47,24 +48,8 @@ class ResultRecord(models.Model):
         verbose_name_plural = "Student Results"
 
     def save(self, *args, **kwargs):
-        # 🔹 Calculate total
-        self.total_score = self.test_score + self.exam_score
-
-        # 🔹 Grade & Remark logic
-        if self.total_score >= 80:
-            self.grade, self.remark = "A", "Excellent"
-        elif self.total_score >= 75:
-            self.grade, self.remark = "B+", "Very Good"
-        elif self.total_score >= 70:
-            self.grade, self.remark = "B", "Good"
-        elif self.total_score >= 65:
-            self.grade, self.remark = "C+", "Credit"
-        elif self.total_score >= 60:
-            self.grade, self.remark = "C", "Average"
-        elif self.total_score >= 50:
-            self.grade, self.remark = "D", "Pass"
-        else:
-            self.grade, self.remark = "F", "Fail"
+        # 🔹 Calculate total, grade & remark
+        apply_grade(self)
 
         super().save(*args, **kwargs)
 
@@ -0,0 +1,214 @@
+"""
+Result sheet PDF rendering (xhtml2pdf), usable outside a request so that
+background report jobs can produce the same file as download_result.
+"""
+import os
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import groupby
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.text import slugify
+from pypdf import PdfWriter
+
+from SMS.versioning import get_versions
+from accounts.metrics import student_version_scope
+from accounts.models import Student
+from .models import ResultRecord
+from .pdf_render import html_to_pdf
+
+
+# Oldest session first; terms and subjects are ordered within each session.
+RESULT_SHEET_ORDER = ("session__start_date", "session_id", "subject__name")
+RESULT_PDF_CACHE_TIMEOUT = 60 * 60
+
+
+def build_results_data(records):
+    """
+    results_data for results/result_pdf.html from one student's records,
+    already ordered by session (oldest first); unmarked scripts are skipped.
+    """
+    term_order = {"1st": 1, "2nd": 2, "3rd": 3}
+    results_data = []
+
+    for session, session_results in groupby(records, key=lambda r: r.session):
+        session_results = [r for r in session_results if r.test_score or r.exam_score]
+        if not session_results:
+            continue
+
+        terms = defaultdict(list)
+        for r in session_results:
+            terms[r.term].append(r)
+        term_list = [
+            {
+                "term_name": term_name,
+                "results": results,
+                "total": sum(r.total_score for r in results),
+                "average": round(sum(r.total_score for r in results) / len(results), 2),
+            }
+            for term_name, results in sorted(terms.items(), key=lambda item: term_order.get(item[0], 99))
+        ]
+
+        session_total = sum(r.total_score for r in session_results)
+        results_data.append({
+            "session": session,
+            "terms": term_list,
+            "session_total": session_total,
+            "session_average": round(session_total / len(session_results), 2),
+        })
+    return results_data
+
+
+def result_context(student, selected_session_id=None):
+    """Template context for results/result_pdf.html, from one results query."""
+    records = (
+        ResultRecord.objects.filter(student=student, session__isnull=False)
+        .select_related("subject", "session")
+        .order_by(*RESULT_SHEET_ORDER)
+    )
+    if selected_session_id:
+        records = records.filter(session_id=selected_session_id)
+
+    return {
+        "student": student,
+        "results_data": build_results_data(records),
+    }
+
+
+def result_pdf_filename(student, selected_session_id=None):
+    # 🔥 Create clean PDF filename: username → full name → id
+    safe_name = slugify(
+        student.user.username
+        or student.user.get_username()
+        or str(student.id)
+    )
+
+    if selected_session_id:
+        return f"{safe_name}_session_result.pdf"
+    return f"{safe_name}_full_result.pdf"
+
+
+def result_pdf(student, selected_session_id=None):
+    """Render a student's result sheet to PDF bytes; ValueError if xhtml2pdf fails."""
+    return html_to_pdf(render_to_string('results/result_pdf.html', result_context(student, selected_session_id)))
+
+
+def cached_result_pdf(student, selected_session_id=None):
+    """
+    result_pdf() cached under the student's results version, which every
+    ResultRecord write for the student (bulk paths included) bumps, so a
+    repeat download skips both the query and the render. Rendered fresh
+    when RESULT_PDF_CACHE is off (no Redis).
+    """
+    if not getattr(settings, "RESULT_PDF_CACHE", False):
+        return result_pdf(student, selected_session_id)
+
+    scope = student_version_scope(student.pk)
+    version = get_versions([scope])[scope]
+    cache_key = f"result_pdf:{student.pk}:{selected_session_id or 'all'}:{version!r}"
+    pdf = cache.get(cache_key)
+    if pdf is None:
+        pdf = result_pdf(student, selected_session_id)
+        cache.set(cache_key, pdf, RESULT_PDF_CACHE_TIMEOUT)
+    return pdf
+
+
+# =========================================
+# 🔹 Batch report cards for a class
+# =========================================
+# All of the class's results come from one query and every sheet's HTML is
+# rendered here. The slow HTML → PDF step runs serially unless the caller asks
+# for workers; the pool's processes are spawned (not forked) so they never
+# share this process's database connections, and spawning re-imports
+# __main__, so only the management commands (run_report_worker,
+# print_report_cards) ask for one.
+REPORT_CARD_CHUNK = 8
+
+
+def default_report_card_workers():
+    """Pool size for the management commands: REPORT_CARD_WORKERS or the CPU count."""
+    return getattr(settings, "REPORT_CARD_WORKERS", None) or os.cpu_count() or 1
+
+
+def class_report_sheets(classroom, selected_session_id=None):
+    """[(student, html)] for every active student in the class, from one results query."""
+    students = list(
+        Student.objects.filter(current_class=classroom, is_active=True)
+        .select_related("user")
+        .order_by("user__last_name", "user__first_name")
+    )
+    records = (
+        ResultRecord.objects.filter(student__in=students, session__isnull=False)
+        .select_related("subject", "session")
+        .order_by("student_id", *RESULT_SHEET_ORDER)
+    )
+    if selected_session_id:
+        records = records.filter(session_id=selected_session_id)
+
+    by_student = {
+        student_id: list(student_records)
+        for student_id, student_records in groupby(records, key=lambda r: r.student_id)
+    }
+    return [
+        (student, render_to_string("results/result_pdf.html", {
+            "student": student,
+            "results_data": build_results_data(by_student.get(student.id, [])),
+        }))
+        for student in students
+    ]
+
+
+def class_report_cards(classroom, selected_session_id=None, archive="pdf", progress=None, workers=1):
+    """
+    Render a class's result sheets and return (filename, bytes): one merged,
+    print-ready PDF (archive="pdf") or a ZIP of per-student PDFs ("zip").
+    `progress(done, total)` is called as sheets finish; `workers` > 1 renders
+    them in a process pool.
+    """
+    if archive not in ("pdf", "zip"):
+        raise ValueError(f"Unknown report card archive: {archive}")
+
+    sheets = class_report_sheets(classroom, selected_session_id)
+    if not sheets:
+        raise ValueError(f"{classroom} has no active students.")
+
+    total = len(sheets)
+    pages = [html for _, html in sheets]
+    pdfs = []
+    if progress:
+        progress(0, total)
+
+    def collect(rendered):
+        for pdf in rendered:
+            pdfs.append(pdf)
+            if progress:
+                progress(len(pdfs), total)
+
+    workers = min(workers or 1, total)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            collect(pool.map(html_to_pdf, pages, chunksize=REPORT_CARD_CHUNK))
+    else:
+        collect(map(html_to_pdf, pages))
+
+    base_name = slugify(f"{classroom.name} report cards")
+    if selected_session_id:
+        base_name += f"-session-{selected_session_id}"
+
+    output = BytesIO()
+    if archive == "zip":
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as bundle:
+            for (student, _), pdf in zip(sheets, pdfs):
+                bundle.writestr(result_pdf_filename(student, selected_session_id), pdf)
+        return f"{base_name}.zip", output.getvalue()
+
+    writer = PdfWriter()
+    for pdf in pdfs:
+        writer.append(BytesIO(pdf))
+    writer.write(output)
+    return f"{base_name}.pdf", output.getvalue()
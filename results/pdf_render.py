@@ -0,0 +1,17 @@
+"""
+HTML → PDF step of the result sheets, kept free of Django imports so that
+spawned worker processes (batch report cards) can import it cheaply.
+"""
+from io import BytesIO
+
+from xhtml2pdf import pisa
+
+
+def html_to_pdf(html):
+    """Render an HTML document to PDF bytes; ValueError if xhtml2pdf fails."""
+    output = BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=output)
+
+    if pisa_status.err:
+        raise ValueError("Error generating PDF")
+    return output.getvalue()
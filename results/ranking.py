@@ -0,0 +1,184 @@
+import operator
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Sum, Window
+from django.db.models.functions import Rank, Round
+
+from SMS.versioning import CommitBatch
+from .models import ResultRecord, ResultSummary
+
+# =========================================
+# 🔹 Class ranking (ResultSummary)
+# =========================================
+# One summary per student for each (classroom, session, term) they have
+# results in. Positions are a Rank() window over the rounded average, so
+# students with the same average share a position and the next one skips
+# (1, 2, 2, 4). ResultRecord signals and the bulk result paths queue the
+# affected classes and re-rank them once the transaction commits; rank
+# everything with `manage.py rank_results`.
+SUMMARY_BATCH = 1000
+SUMMARY_FIELDS = ["classroom", "total_subjects", "total_score", "average_score", "position"]
+
+
+class AggregateWindow(Window):
+    """
+    Window over aggregated rows. Plain Window annotations on a values()
+    GROUP BY query get added to the GROUP BY themselves, which databases
+    reject once the window orders by an aggregate.
+    """
+
+    def get_group_by_cols(self):
+        return []
+
+
+def ranked_summary_rows(records):
+    """
+    Per-student totals and class positions for a ResultRecord queryset, as
+    dicts with student_id, classroom_id, session_id, term, subjects, score,
+    average and position. One query. Unmarked scripts (0/0, e.g. blank grid
+    rows) count neither as a subject nor towards the average.
+    """
+    average = Round(Avg("total_score"), 2)
+    return (
+        records.filter(session__isnull=False)
+        .exclude(test_score=0, exam_score=0)
+        .order_by()
+        .values("student_id", "classroom_id", "session_id", "term")
+        .annotate(
+            subjects=Count("id"),
+            score=Sum("total_score"),
+            average=average,
+            position=AggregateWindow(
+                Rank(),
+                partition_by=[F("classroom_id"), F("session_id"), F("term")],
+                order_by=average.desc(),
+            ),
+        )
+    )
+
+
+def _away_results(records):
+    """
+    (student_id, session_id, term, classroom_id) for results a student has
+    outside their home class. A student moved mid-term has results in two
+    classes; they are ranked and summarised with the class holding most of
+    them (ties go to the later class) and left out of the other one.
+    """
+    classes = {}
+    for row in (
+        records.filter(session__isnull=False)
+        .exclude(test_score=0, exam_score=0)
+        .order_by()
+        .values("student_id", "session_id", "term", "classroom_id")
+        .annotate(subjects=Count("id"))
+    ):
+        classes.setdefault((row["student_id"], row["session_id"], row["term"]), []).append(row)
+
+    away = []
+    for key, rows in classes.items():
+        if len(rows) > 1:
+            home = max(rows, key=lambda row: (row["subjects"], row["classroom_id"]))
+            away += [(*key, row["classroom_id"]) for row in rows if row is not home]
+    return away
+
+
+def _exclude_away(records, away):
+    if not away:
+        return records
+    return records.exclude(reduce(operator.or_, (
+        Q(student_id=student_id, session_id=session_id, term=term, classroom_id=classroom_id)
+        for student_id, session_id, term, classroom_id in away
+    )))
+
+
+def store_summaries(rows, existing):
+    """
+    Upsert ResultSummary rows from ranked_summary_rows() output.
+
+    `existing` is the ResultSummary queryset the rows replace: summaries in
+    it that no row matches (the student's results were deleted or moved) are
+    removed. Returns (created, updated, deleted) counts.
+    """
+    summaries = {
+        (summary.student_id, summary.session_id, summary.term): summary
+        for summary in existing.only("id", "student_id", "session_id", "term", *SUMMARY_FIELDS)
+    }
+
+    to_create, to_update = [], []
+    for row in rows:
+        values = {
+            "classroom_id": row["classroom_id"],
+            "total_subjects": row["subjects"],
+            "total_score": row["score"],
+            "average_score": row["average"],
+            "position": row["position"],
+        }
+        summary = summaries.pop((row["student_id"], row["session_id"], row["term"]), None)
+        if summary is None:
+            to_create.append(ResultSummary(
+                student_id=row["student_id"], session_id=row["session_id"], term=row["term"], **values
+            ))
+        elif any(getattr(summary, name) != value for name, value in values.items()):
+            for name, value in values.items():
+                setattr(summary, name, value)
+            to_update.append(summary)
+
+    with transaction.atomic():
+        if summaries:
+            ResultSummary.objects.filter(pk__in=[summary.pk for summary in summaries.values()]).delete()
+        ResultSummary.objects.bulk_create(to_create, batch_size=SUMMARY_BATCH)
+        ResultSummary.objects.bulk_update(to_update, SUMMARY_FIELDS, batch_size=SUMMARY_BATCH)
+    return len(to_create), len(to_update), len(summaries)
+
+
+def rank_class(classroom_id, session_id, term):
+    """Recompute summaries and positions for one class's session/term."""
+    if not (classroom_id and session_id and term):
+        return 0, 0, 0
+    term_records = ResultRecord.objects.filter(session_id=session_id, term=term)
+    class_records = term_records.filter(classroom_id=classroom_id)
+    away = _away_results(term_records.filter(student_id__in=class_records.values("student_id")))
+    # Students visiting from their home class keep the summary stored there
+    visitors = [student_id for student_id, _, _, away_class in away if away_class == classroom_id]
+
+    rows = list(ranked_summary_rows(_exclude_away(class_records, away)))
+    existing = (
+        ResultSummary.objects.filter(session_id=session_id, term=term)
+        .filter(Q(classroom_id=classroom_id) | Q(student_id__in=[row["student_id"] for row in rows]))
+        .exclude(student_id__in=visitors)
+    )
+    return store_summaries(rows, existing)
+
+
+def rank_school(session_id=None, term=None):
+    """Recompute every class in one ranking query (optionally one session/term)."""
+    records = ResultRecord.objects.all()
+    existing = ResultSummary.objects.all()
+    if session_id:
+        records, existing = records.filter(session_id=session_id), existing.filter(session_id=session_id)
+    if term:
+        records, existing = records.filter(term=term), existing.filter(term=term)
+    records = _exclude_away(records, _away_results(records))
+    return store_summaries(ranked_summary_rows(records).iterator(chunk_size=SUMMARY_BATCH), existing)
+
+
+# =========================================
+# 🔹 Incremental re-ranking after commit
+# =========================================
+def ranking_key(record):
+    return (record.classroom_id, record.session_id, record.term)
+
+
+def flush_class_rankings(keys):
+    for classroom_id, session_id, term in sorted(keys):
+        rank_class(classroom_id, session_id, term)
+
+
+_class_rankings = CommitBatch(set, flush_class_rankings)
+
+
+def queue_class_ranking(keys):
+    """Re-rank the given (classroom_id, session_id, term) classes once the transaction commits."""
+    with _class_rankings.collect() as pending:
+        pending.update(key for key in keys if all(key))
@@ -1,8 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from accounts.models import Student
 from academics.models import Subject, Enrollment
 from django.utils import timezone
+from accounts.metrics import bump_student_versions, bump_teacher_versions
+from .models import ResultRecord
+from .ranking import queue_class_ranking, ranking_key
+from .stats import bump_class_stats
 
 # 🔹 Auto-enroll new students
 @receiver(post_save, sender=Student)
@@ -39,3 +43,52 @@ def update_student_enrollments_on_class_change(sender, instance, **kwargs):
                     subject=subject,
                     defaults={"date_enrolled": timezone.now()}
                 )
+
+
+# 🔹 Invalidate the cached student dashboard snapshot
+@receiver(post_save, sender=ResultRecord)
+@receiver(post_delete, sender=ResultRecord)
+def bump_student_dashboard_on_result(sender, instance, **kwargs):
+    bump_student_versions([instance.student_id])
+
+
+# 🔹 Invalidate the cached teacher dashboard snapshot (old and new teacher)
+@receiver(pre_save, sender=Subject)
+def remember_previous_teacher(sender, instance, **kwargs):
+    instance._previous_teacher_id = (
+        sender.objects.filter(pk=instance.pk).values_list("teacher_id", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(pre_save, sender=ResultRecord)
+def remember_previous_result(sender, instance, **kwargs):
+    # Old teacher for the dashboards, old class/session/term for rankings and stats
+    previous = (
+        sender.objects.filter(pk=instance.pk).values("teacher_id", "classroom_id", "session_id", "term").first()
+        if instance.pk else None
+    ) or {}
+    instance._previous_teacher_id = previous.get("teacher_id")
+    instance._previous_ranking_key = (previous.get("classroom_id"), previous.get("session_id"), previous.get("term"))
+
+
+@receiver(post_save, sender=ResultRecord)
+@receiver(post_delete, sender=ResultRecord)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def bump_teacher_dashboard(sender, instance, **kwargs):
+    bump_teacher_versions([instance.teacher_id, getattr(instance, "_previous_teacher_id", None)])
+
+
+# 🔹 Re-rank the affected class (ResultSummary positions) after commit
+@receiver(post_save, sender=ResultRecord)
+@receiver(post_delete, sender=ResultRecord)
+def rerank_class_on_result(sender, instance, **kwargs):
+    queue_class_ranking([ranking_key(instance), getattr(instance, "_previous_ranking_key", (None, None, None))])
+
+
+# 🔹 Invalidate cached subject statistics for the class-term (old and new)
+@receiver(post_save, sender=ResultRecord)
+@receiver(post_delete, sender=ResultRecord)
+def bump_class_stats_on_result(sender, instance, **kwargs):
+    bump_class_stats([ranking_key(instance), getattr(instance, "_previous_ranking_key", (None, None, None))])
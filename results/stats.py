@@ -0,0 +1,106 @@
+from itertools import groupby
+
+import numpy as np
+from django.core.cache import cache
+
+from SMS.versioning import bump_version, get_versions
+from .grading import get_grading_scale
+from .models import ResultRecord
+
+# =========================================
+# 🔹 Subject statistics per class/session/term
+# =========================================
+# One values_list query per (classroom, session, term) feeds NumPy for every
+# subject in it; the result is cached under that class-term's version scope,
+# which ResultRecord signals and the bulk result paths bump. Unmarked scripts
+# (total 0, e.g. blank grid rows) are counted but left out of the figures.
+STATS_CACHE_TIMEOUT = 60 * 60
+STATS_PERCENTILES = (25, 75, 90)
+
+
+def class_stats_version_scope(classroom_id, session_id, term):
+    return f"results:{classroom_id}:{session_id}:{term}"
+
+
+def bump_class_stats(keys):
+    """Invalidate stats for (classroom_id, session_id, term) keys."""
+    scopes = {class_stats_version_scope(*key) for key in keys if all(key)}
+    if scopes:
+        bump_version(*scopes)
+
+
+def describe_scores(totals, grades):
+    """Summary figures for one subject's marked totals (parallel total/grade lists)."""
+    scores = np.asarray(totals, dtype=float)
+    histogram = dict.fromkeys(reversed(get_grading_scale().grades), 0)
+    for grade, count in zip(*np.unique(np.asarray(grades, dtype=object), return_counts=True)):
+        histogram[grade] = int(count)
+
+    if not scores.size:
+        return {"count": 0, "grades": histogram}
+    percentiles = np.percentile(scores, STATS_PERCENTILES)
+    return {
+        "count": int(scores.size),
+        "mean": round(float(scores.mean()), 2),
+        "median": round(float(np.median(scores)), 2),
+        "std": round(float(scores.std()), 2),
+        "min": float(scores.min()),
+        "max": float(scores.max()),
+        "percentiles": {f"p{p}": round(float(value), 2) for p, value in zip(STATS_PERCENTILES, percentiles)},
+        "grades": histogram,
+    }
+
+
+def _build_class_stats(classroom_id, session_id, term):
+    rows = (
+        ResultRecord.objects.filter(classroom_id=classroom_id, session_id=session_id, term=term)
+        .order_by("subject_id")
+        .values_list("subject_id", "subject__name", "total_score", "grade")
+    )
+    stats = {}
+    for (subject_id, subject_name), subject_rows in groupby(rows, key=lambda row: row[:2]):
+        subject_rows = list(subject_rows)
+        marked = [row for row in subject_rows if row[2]]
+        stats[subject_id] = {
+            "subject": subject_name,
+            "unmarked": len(subject_rows) - len(marked),
+            **describe_scores([row[2] for row in marked], [row[3] for row in marked]),
+        }
+    return stats
+
+
+def class_stats_many(keys):
+    """
+    {(classroom_id, session_id, term): {subject_id: stats}} for several
+    class-terms, with one version lookup and one cache round trip; only
+    stale entries are recomputed.
+    """
+    keys = {tuple(key) for key in keys if all(key)}
+    if not keys:
+        return {}
+    versions = get_versions([class_stats_version_scope(*key) for key in keys])
+    cache_keys = {
+        key: f"stats:{class_stats_version_scope(*key)}:{versions[class_stats_version_scope(*key)]!r}"
+        for key in keys
+    }
+    cached = cache.get_many(cache_keys.values())
+
+    stats, fresh = {}, {}
+    for key, cache_key in cache_keys.items():
+        if cache_key in cached:
+            stats[key] = cached[cache_key]
+        else:
+            stats[key] = fresh[cache_key] = _build_class_stats(*key)
+    if fresh:
+        cache.set_many(fresh, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def class_subject_stats(classroom_id, session_id, term):
+    """{subject_id: stats} for one class's session/term."""
+    return class_stats_many([(classroom_id, session_id, term)]).get((classroom_id, session_id, term), {})
+
+
+def subject_stats(subject, session, term):
+    """Stats for one subject in its own class, or None before any results exist."""
+    return class_subject_stats(subject.classroom_id, getattr(session, "pk", session), term).get(subject.pk)
@@ -6,8 +6,10 @@ urlpatterns = [
     path("my-results/", views.view_my_results, name="view_my_results"),
     path("upload-results/", views.upload_results, name="upload_results"),
     path("download-template/", views.download_results_template, name="download_results_template"),
+    path("upload-results/errors/", views.download_import_errors, name="download_import_errors"),
 
     path('download_result/', views.download_result, name='download_result'),
+    path("class-report-cards/", views.download_class_report_cards, name="download_class_report_cards"),
 
 
 ]
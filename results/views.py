@@ -1,16 +1,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import transaction
 from django.http import HttpResponse
 
-from academics.models import Subject, Session, Enrollment
+from academics.models import ClassRoom, Subject, Session, Enrollment
 from accounts.models import Student
 from .models import ResultRecord
 from .forms import ResultEntryForm
+from .grid import EXAM_MAX, TEST_MAX, load_result_grid, parse_score, save_result_grid
+from .imports import get_error_report, import_results, iter_result_rows, store_error_report
+from reports.views import enqueue_report_response
 import csv
 import io
 
+IMPORT_ERROR_SESSION_KEY = "result_import_errors"
 
 
 
@@ -40,54 +43,29 @@ def mark_results(request):
     if subject_id and session_id and term:
         selected_subject = get_object_or_404(Subject, id=subject_id, teacher=teacher)
         session = get_object_or_404(Session, id=session_id)
-        classroom = selected_subject.classroom
-
-        # 🔹 Current session students (auto detect class)
-        students = Student.objects.filter(current_class=classroom, is_active=True).select_related("user")
-
-        # 🔹 Ensure each student is enrolled in the subject
-        for student in students:
-            Enrollment.objects.get_or_create(student=student, subject=selected_subject)
-
-        # 🔹 Ensure each student has a result record for this session & term
-        results_data = []
-        for student in students:
-            result, _ = ResultRecord.objects.get_or_create(
-                student=student,
-                subject=selected_subject,
-                classroom=classroom,
-                session=session,
-                term=term,
-                defaults={"teacher": teacher, "test_score": 0, "exam_score": 0},
-            )
-            results_data.append(result)
 
-        combined = zip(students, results_data)
+        # 🔹 Class sheet: enrollments and result records created in bulk where missing
+        grid = load_result_grid(selected_subject, session, term, teacher)
+        students = [student for student, _ in grid]
+        combined = grid
 
         # 🔹 Handle POST (bulk saving results)
         if request.method == "POST":
             try:
-                with transaction.atomic():
-                    for student, record in zip(students, results_data):
-                        test_score = request.POST.get(f"test_{student.id}", "0")
-                        exam_score = request.POST.get(f"exam_{student.id}", "0")
-
-                        record.test_score = float(test_score or 0)
-                        record.exam_score = float(exam_score or 0)
-                        record.teacher = teacher
-                        record.save()
+                scores = {
+                    student.id: (
+                        parse_score(request.POST.get(f"test_{student.id}", "0"), TEST_MAX, "Test score"),
+                        parse_score(request.POST.get(f"exam_{student.id}", "0"), EXAM_MAX, "Exam score"),
+                    )
+                    for student in students
+                }
+                save_result_grid(grid, scores, teacher)
 
                 messages.success(request, "✅ Results saved successfully!")
                 return redirect("mark_results")
             except Exception as e:
                 messages.error(request, f"❌ Error saving results: {e}")
 
-    # 🔹 Historical results for this student (all sessions)
-    historical_results = {}
-    if selected_subject:
-        for student in students:
-            historical_results[student.id] = ResultRecord.objects.filter(student=student).exclude(session_id=session_id)
-
     return render(request, "results/mark_results.html", {
         "subjects": subjects,
         "sessions": sessions,
@@ -95,23 +73,20 @@ def mark_results(request):
         "selected_subject": selected_subject,
         "selected_session": session_id,
         "selected_term": term,
-        "historical_results": historical_results,
+        "import_error_report": bool(request.session.get(IMPORT_ERROR_SESSION_KEY)),
     })
 
 
-# View for uploading results via CSV
+# View for uploading results via CSV / XLSX
 @login_required
 def upload_results(request):
-    """Allow teachers to upload a CSV of results for a specific subject/session/term."""
+    """Allow teachers to upload a CSV or XLSX sheet of results for a specific subject/session/term."""
     teacher = request.user
 
     if teacher.role != "teacher":
         messages.error(request, "You are not authorized to access this page.")
         return redirect("dashboard")
 
-    subjects = Subject.objects.filter(teacher=teacher).select_related("classroom")
-    sessions = Session.objects.all().order_by("-start_date")
-
     if request.method == "POST":
         session_id = request.POST.get("session")
         term = request.POST.get("term")
@@ -124,52 +99,45 @@ def upload_results(request):
 
         session = get_object_or_404(Session, id=session_id)
         subject = get_object_or_404(Subject, id=subject_id, teacher=teacher)
-        classroom = subject.classroom
+        request.session.pop(IMPORT_ERROR_SESSION_KEY, None)
 
         try:
-            decoded_file = file.read().decode("utf-8").splitlines()
-            reader = csv.DictReader(decoded_file)
-
-            with transaction.atomic():
-                for row in reader:
-                    student_id = row.get("student_id")
-                    test_score = float(row.get("test_score", 0))
-                    exam_score = float(row.get("exam_score", 0))
-
-                    # 🔹 Detect student (active or previously enrolled)
-                    student = Student.objects.get(id=student_id, is_active=True)
-
-                    # 🔹 Auto-create or update result for the session/term only
-                    result, created = ResultRecord.objects.get_or_create(
-                        student=student,
-                        subject=subject,
-                        session=session,
-                        term=term,
-                        defaults={
-                            "classroom": student.current_class,
-                            "teacher": teacher,
-                            "test_score": test_score,
-                            "exam_score": exam_score,
-                        }
-                    )
-
-                    if not created:
-                        result.test_score = test_score
-                        result.exam_score = exam_score
-                        result.teacher = teacher
-                        result.save()
-
-            messages.success(request, "✅ Results uploaded successfully!")
+            outcome = import_results(iter_result_rows(file), subject, session, term, teacher)
+        except ValueError as e:
+            messages.error(request, f"❌ Error processing file: {e}")
             return redirect("mark_results")
 
-        except Student.DoesNotExist:
-            messages.error(request, "❌ One or more students in the CSV do not exist or are inactive.")
-        except Exception as e:
-            messages.error(request, f"❌ Error processing file: {e}")
+        if outcome.imported:
+            messages.success(
+                request,
+                f"✅ {outcome.imported} result(s) uploaded ({outcome.created} new, {outcome.updated} updated).",
+            )
+        if outcome.errors:
+            request.session[IMPORT_ERROR_SESSION_KEY] = store_error_report(outcome.errors)
+            messages.warning(
+                request,
+                f"⚠️ {len(outcome.errors)} row(s) were rejected. Download the error report for details.",
+            )
+        elif not outcome.imported:
+            messages.error(request, "❌ The file has no result rows.")
 
     return redirect("mark_results")
 
 
+@login_required
+def download_import_errors(request):
+    """Rejected rows from this user's last results upload, as CSV."""
+    token = request.session.get(IMPORT_ERROR_SESSION_KEY)
+    report = get_error_report(token) if token else None
+    if report is None:
+        messages.error(request, "No error report is available. Upload the file again to regenerate it.")
+        return redirect("mark_results")
+
+    response = HttpResponse(report, content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="results_import_errors.csv"'
+    return response
+
+
 @login_required
 def download_results_template(request):
     """Generate CSV template for teachers to fill results."""
@@ -243,96 +211,44 @@ def view_my_results(request):
 
 
 
-from xhtml2pdf import pisa
-from collections import defaultdict
+from .pdf import cached_result_pdf, result_pdf_filename
 
-from xhtml2pdf import pisa
-from collections import defaultdict
-from django.utils.text import slugify
 
 @login_required
 def download_result(request):
     student = request.user.student
     selected_session_id = request.GET.get("session")
 
-    # Get sessions
-    if selected_session_id:
-        sessions = Session.objects.filter(id=selected_session_id)
-    else:
-        sessions = Session.objects.all().order_by("start_date")  # oldest → newest
-
-    # Define term ordering
-    term_order = {"1st": 1, "2nd": 2, "3rd": 3}
-
-    # Prepare flattened results for template
-    results_data = []
+    if request.GET.get("background"):
+        return enqueue_report_response(
+            request, "result_pdf", {"student_id": student.pk, "session_id": selected_session_id}
+        )
 
-    for session in sessions:
-        session_results = ResultRecord.objects.filter(
-            student=student,
-            session=session,
-            test_score__isnull=False,
-            exam_score__isnull=False
-        ).exclude(test_score=0, exam_score=0)
-
-        if session_results.exists():
-            # Session totals
-            session_total = sum(r.total_score for r in session_results)
-            session_average = round(session_total / session_results.count(), 2)
-
-            # Group results by term
-            term_counter = defaultdict(list)
-            for r in session_results:
-                term_counter[r.term].append(r)
-
-            term_list = []
-            for term_name, results in term_counter.items():
-                term_total = sum(r.total_score for r in results)
-                term_average = round(term_total / len(results), 2)
-                term_list.append({
-                    "term_name": term_name,
-                    "results": results,
-                    "total": term_total,
-                    "average": term_average
-                })
-
-            # Sort terms
-            term_list = sorted(term_list, key=lambda t: term_order.get(t["term_name"], 99))
-
-            results_data.append({
-                "session": session,
-                "terms": term_list,
-                "session_total": session_total,
-                "session_average": session_average
-            })
+    try:
+        pdf = cached_result_pdf(student, selected_session_id)
+    except ValueError:
+        return HttpResponse('Error generating PDF', status=500)
 
-    context = {
-        "student": student,
-        "results_data": results_data
-    }
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{result_pdf_filename(student, selected_session_id)}"'
+    return response
 
-    # PDF generation
-    template_path = 'results/result_pdf.html'
-    response = HttpResponse(content_type='application/pdf')
 
-    # 🔥 Create clean PDF filename: username → full name → id
-    safe_name = slugify(
-        student.user.username
-        or student.user.get_username()
-        or str(student.id)
+# Batch report cards for a whole class (always rendered by the report worker)
+@login_required
+def download_class_report_cards(request):
+    user = request.user
+    classroom = get_object_or_404(ClassRoom, id=request.GET.get("classroom"))
+    allowed = user.role in ("admin", "super_admin") or (
+        user.role == "teacher" and Subject.objects.filter(classroom=classroom, teacher=user).exists()
     )
+    if not allowed:
+        messages.error(request, "You are not authorized to access this page.")
+        return redirect("dashboard")
 
-    if selected_session_id:
-        filename = f"{safe_name}_session_result.pdf"
-    else:
-        filename = f"{safe_name}_full_result.pdf"
-
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    html = render(request, template_path, context).content.decode('utf-8')
-    pisa_status = pisa.CreatePDF(html, dest=response)
-
-    if pisa_status.err:
-        return HttpResponse('Error generating PDF', status=500)
-
-    return response
+    archive = "zip" if request.GET.get("format") == "zip" else "pdf"
+    return enqueue_report_response(request, "class_report_cards", {
+        "classroom_id": classroom.pk,
+        "session_id": request.GET.get("session") or None,
+        "archive": archive,
+    })
@@ -96,6 +96,7 @@ def apply_migrations():
     print("🔧 Applying migrations...")
     run_command([str(PYTHON_EXE), str(MANAGE_PY), "makemigrations"], silent=False)
     run_command([str(PYTHON_EXE), str(MANAGE_PY), "migrate"], silent=False)
+    run_command([str(PYTHON_EXE), str(MANAGE_PY), "createcachetable"], silent=False)
 
 
 # =========================================
@@ -0,0 +1,33 @@
+// Live finance updates pushed over ws/finance/ (see finance/consumers.py).
+// financeLive.subscribe(fn) calls fn(payload) for every finance.update message;
+// financeLive.isConnected() lets pages skip their polling while the socket is up.
+window.financeLive = (() => {
+  const MAX_RETRY_DELAY = 30000;
+  const listeners = [];
+  let socket = null;
+  let retryDelay = 1000;
+
+  function connect() {
+    const scheme = window.location.protocol === "https:" ? "wss" : "ws";
+    socket = new WebSocket(`${scheme}://${window.location.host}/ws/finance/`);
+
+    socket.onopen = () => { retryDelay = 1000; };
+    socket.onmessage = (event) => {
+      const payload = JSON.parse(event.data);
+      if (payload.type !== "finance.update") return;
+      listeners.forEach((listener) => listener(payload));
+    };
+    socket.onclose = () => {
+      // Pages fall back to polling until the socket is back.
+      setTimeout(connect, retryDelay);
+      retryDelay = Math.min(retryDelay * 2, MAX_RETRY_DELAY);
+    };
+  }
+
+  if ("WebSocket" in window) connect();
+
+  return {
+    subscribe(listener) { listeners.push(listener); },
+    isConnected() { return socket !== null && socket.readyState === WebSocket.OPEN; },
+  };
+})();
@@ -0,0 +1,60 @@
+// Links marked with data-report-job render their PDF in the background:
+// queue the job, poll its status, then start the download when it is ready.
+document.addEventListener("DOMContentLoaded", () => {
+  const POLL_INTERVAL = 2000;
+  // 32 minutes queued, then again once running: longer than the worker's
+  // RUNNING_JOB_TIMEOUT (30 minutes), so a stuck render comes back as failed
+  // before the page gives up on it.
+  const MAX_POLLS = 960;
+
+  document.querySelectorAll("a[data-report-job]").forEach((link) => {
+    link.addEventListener("click", async (event) => {
+      event.preventDefault();
+      if (link.dataset.busy) return;
+
+      const originalText = link.textContent;
+      link.dataset.busy = "1";
+      link.textContent = "⏳ Preparing...";
+
+      const reset = () => {
+        delete link.dataset.busy;
+        link.textContent = originalText;
+      };
+
+      try {
+        const url = new URL(link.href, window.location.origin);
+        url.searchParams.set("background", "1");
+        let job = await (await fetch(url, { credentials: "same-origin" })).json();
+
+        let polls = 0;
+        let running = job.status === "running";
+        while (job.status === "pending" || job.status === "running") {
+          if (++polls > MAX_POLLS) {
+            alert("⌛ The report is taking longer than expected. Please try again later.");
+            reset();
+            return;
+          }
+          await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL));
+          job = await (await fetch(job.status_url, { credentials: "same-origin" })).json();
+          if (job.status === "running" && !running) {
+            running = true;
+            polls = 0;
+          }
+          if (job.status === "running" && job.progress) {
+            link.textContent = `⏳ Preparing... ${job.progress}%`;
+          }
+        }
+
+        if (job.download_url) {
+          window.location = job.download_url;
+        } else {
+          alert(`❌ Report failed: ${job.error || "unknown error"}`);
+        }
+      } catch (err) {
+        console.error("Report job error:", err);
+        alert("❌ Could not generate the report. Please try again.");
+      }
+      reset();
+    });
+  });
+});